@@ -1,9 +1,24 @@
 """Analyze batch of neuron output files.
 """
+import inspect
+import json
 import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from glob import glob
+from typing import Callable
 
-from AnalyzeSingle import run
+from AnalyzeSingle import analysis_params, load_data, process, run, write
+
+from vitrocal.datasets.ResultsStore import hash_file, hash_params
+
+MANIFEST = "../data/02_intermediate/manifest.json"
+WRITE_ARGS = ('fpath_out', 'average', 'store', 'condition', 'format')
 
 
 def list_files(dir: str | os.PathLike="../data/01_raw/") -> list:
@@ -18,16 +33,340 @@ def list_files(dir: str | os.PathLike="../data/01_raw/") -> list:
     dir = os.path.join(dir, "*.xlsx")
     return glob(dir)
 
-def run_batch(file_list: list) -> None:
+def resolve_condition(file: str | os.PathLike,
+                      condition: str | dict | Callable[[str], str]=None) -> str:
+    """Look up the experimental condition of a file.
+
+    Args:
+        file (str | os.PathLike): File path.
+        condition (str | dict | Callable[[str], str], optional): Condition of
+            all files, a mapping from file path or file name to condition, or
+            a function of the file path. Defaults to None.
+
+    Returns:
+        str: Condition of `file` (None if it is not in the mapping).
+    """
+    if callable(condition):
+        return condition(file)
+    if isinstance(condition, dict):
+        return condition.get(file, condition.get(os.path.basename(file)))
+    return condition
+
+def run_batch(file_list: list, condition: str | dict | Callable[[str], str]=None,
+              **kwargs) -> None:
     """Call `AnalyzeSingle.run()` for each file in a list.
 
     Args:
         file_list (list): List of file paths.
+        condition (str | dict | Callable[[str], str], optional): Condition per
+            file, see `resolve_condition()`. Defaults to None.
+        **kwargs: Passed to `AnalyzeSingle.run()`, e.g. `store`.
+    """
+    for file in file_list:
+        run(fpath_in=file, condition=resolve_condition(file, condition), **kwargs)
+
+def run_pipelined(file_list: list, load_args: dict={'header': None},
+                  prefetch: int=2, write_backlog: int=2,
+                  condition: str | dict | Callable[[str], str]=None,
+                  **kwargs) -> None:
+    """Analyze files while loading upcoming and writing previous files.
+
+    Up to `prefetch` files are loaded ahead on background threads and up to
+    `write_backlog` finished results wait for a background writer, so reads
+    and writes overlap with analysis. Both limits bound memory use: loading
+    and analysis pause while their queue is full.
+
+    Args:
+        file_list (list): List of file paths.
+        load_args (dict, optional): Passed to `pd.read_excel()`.
+            Defaults to {'header': None}.
+        prefetch (int, optional): Files loaded ahead. Defaults to 2.
+        write_backlog (int, optional): Results waiting to be written.
+            Defaults to 2.
+        condition (str | dict | Callable[[str], str], optional): Condition per
+            file, see `resolve_condition()`. Defaults to None.
+        **kwargs: Passed to `AnalyzeSingle.run()`.
+
+    Raises:
+        Exception: First error raised while writing results.
+    """
+    write_args = {k: kwargs.pop(k) for k in WRITE_ARGS if k in kwargs}
+    params = analysis_params(load_args, **kwargs)
+
+    writes = queue.Queue(maxsize=max(write_backlog, 1))
+    errors = []
+
+    def _writer():
+        """Write queued results until a `None` sentinel arrives."""
+        while True:
+            item = writes.get()
+            if item is None:
+                return
+            try:
+                if not errors:
+                    *args, file, started_at = item
+                    write(*args, file, params=params, started_at=started_at,
+                          condition=resolve_condition(file, condition), **write_args)
+            except Exception as e:  # surfaced on the main thread
+                errors.append(e)
+
+    writer = threading.Thread(target=_writer, daemon=True)
+    writer.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as loader:
+            files = iter(file_list)
+            loading = deque()
+            for file in files:
+                loading.append((file, loader.submit(load_data, file, load_args)))
+                if len(loading) >= max(prefetch, 1):
+                    break
+
+            while loading and not errors:
+                file, future = loading.popleft()
+                upcoming = next(files, None)
+                if upcoming is not None:
+                    loading.append(
+                        (upcoming, loader.submit(load_data, upcoming, load_args))
+                    )
+
+                started_at = datetime.now(timezone.utc).isoformat()
+                df, fname = future.result()
+                results, avg_results = process(df, **kwargs)
+                writes.put((results, avg_results, fname, file, started_at))
+
+            for _, future in loading:
+                future.cancel()
+    finally:
+        writes.put(None)
+        writer.join()
+
+    if errors:
+        raise errors[0]
+
+def load_manifest(manifest: str | os.PathLike=MANIFEST) -> dict:
+    """Load the manifest of processed files.
+
+    Args:
+        manifest (str | os.PathLike, optional): Manifest path.
+            Defaults to "../data/02_intermediate/manifest.json".
+
+    Returns:
+        dict: Entry per processed file with its size, modification time,
+            content hash, parameter hash and processing time.
+    """
+    if not os.path.exists(manifest):
+        return {}
+    with open(manifest, 'r') as file:
+        return json.load(file)
+
+def save_manifest(entries: dict, manifest: str | os.PathLike=MANIFEST) -> None:
+    """Atomically write the manifest of processed files.
+
+    Args:
+        entries (dict): Output from `load_manifest()`.
+        manifest (str | os.PathLike, optional): Manifest path.
+            Defaults to "../data/02_intermediate/manifest.json".
+    """
+    tmp = f"{manifest}.tmp"
+    with open(tmp, 'w') as file:
+        json.dump(entries, file, indent=2, sort_keys=True)
+    os.replace(tmp, manifest)
+
+def _fingerprint(file: str | os.PathLike, entry: dict=None) -> dict:
+    """Size, modification time and content hash of a file.
+
+    The content hash is only recomputed when size or modification time
+    differ from `entry`.
+
+    Args:
+        file (str | os.PathLike): File path.
+        entry (dict, optional): Previous manifest entry. Defaults to None.
+
+    Returns:
+        dict: Fingerprint.
+    """
+    stat = os.stat(file)
+    fingerprint = {'size': stat.st_size, 'mtime': stat.st_mtime}
+    if entry is not None and all(entry.get(k) == v for k, v in fingerprint.items()):
+        fingerprint['input_hash'] = entry['input_hash']
+    else:
+        fingerprint['input_hash'] = hash_file(file)
+    return fingerprint
+
+def _param_hash(kwargs: dict) -> str:
+    """Hash the resolved analysis parameters of a run.
+
+    Defaults are filled in, so omitting a parameter and passing its default
+    give the same hash. Output-only arguments (`WRITE_ARGS`) are ignored.
+
+    Args:
+        kwargs (dict): Parameters passed to `AnalyzeSingle.run()`.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+    process_args = {k: v for k, v in kwargs.items() if k not in WRITE_ARGS}
+    load_args = process_args.pop('load_args', {'header': None})
+    return hash_params(analysis_params(load_args, **process_args))
+
+def _output_hash(kwargs: dict) -> str:
+    """Hash the output target of a run.
+
+    A `ResultsStore` is identified by its path; otherwise the output
+    directory, `format` and `average` identify the written files.
+
+    Args:
+        kwargs (dict): Parameters passed to `AnalyzeSingle.run()`.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+    defaults = inspect.signature(write).parameters
+    args = {k: kwargs.get(k, defaults[k].default)
+            for k in ('store', 'fpath_out', 'format', 'average')}
+    if args['store'] is not None:
+        return hash_params({'store': os.path.abspath(args['store'])})
+    return hash_params({'fpath_out': os.path.abspath(args['fpath_out']),
+                        'format': args['format'], 'average': args['average']})
+
+def _find_pending(file_list: list, entries: dict, param_hash: str,
+                  output_hash: str) -> dict:
+    """Fingerprint files that are new, changed, or were run with other
+    parameters or into another output.
+
+    Args:
+        file_list (list): List of file paths.
+        entries (dict): Output from `load_manifest()`.
+        param_hash (str): Hash of the current parameters.
+        output_hash (str): Hash of the current output target.
+
+    Returns:
+        dict: Fingerprint per pending file path.
     """
+    pending = {}
     for file in file_list:
-        run(fpath_in=file)
+        entry = entries.get(os.path.abspath(file))
+        fingerprint = _fingerprint(file, entry)
+        if (entry is None or entry.get('param_hash') != param_hash
+                or entry.get('output_hash') != output_hash
+                or fingerprint['input_hash'] != entry['input_hash']):
+            pending[file] = fingerprint
+    return pending
+
+def list_pending(file_list: list, entries: dict, **kwargs) -> list:
+    """Select files that are new, changed, or were run with other parameters
+    or into another output.
+
+    Args:
+        file_list (list): List of file paths.
+        entries (dict): Output from `load_manifest()`.
+        **kwargs: Parameters passed to `AnalyzeSingle.run()`.
+
+    Returns:
+        list: Pending file paths.
+    """
+    return list(_find_pending(file_list, entries, _param_hash(kwargs), _output_hash(kwargs)))
+
+def run_incremental(file_list: list, manifest: str | os.PathLike=MANIFEST,
+                    skip_errors: bool=False,
+                    condition: str | dict | Callable[[str], str]=None,
+                    **kwargs) -> list:
+    """Call `AnalyzeSingle.run()` only for new or changed files.
+
+    A file is also processed again when the analysis parameters or the
+    output target (`store`, or `fpath_out`, `format` and `average`) differ
+    from its last run. The manifest is updated after every file, so an
+    interrupted batch resumes where it stopped.
+
+    Args:
+        file_list (list): List of file paths.
+        manifest (str | os.PathLike, optional): Manifest path.
+            Defaults to "../data/02_intermediate/manifest.json".
+        skip_errors (bool, optional): Log files that fail and continue with
+            the next one. Failed files are recorded in the manifest and only
+            retried once they, the parameters or the output change.
+            Defaults to False.
+        condition (str | dict | Callable[[str], str], optional): Condition per
+            file, see `resolve_condition()`. Defaults to None.
+        **kwargs: Passed to `AnalyzeSingle.run()`.
+
+    Returns:
+        list: Processed file paths.
+    """
+    entries = load_manifest(manifest)
+    param_hash = _param_hash(kwargs)
+    output_hash = _output_hash(kwargs)
+    pending = _find_pending(file_list, entries, param_hash, output_hash)
+    if pending:
+        print(f"{len(pending)} of {len(file_list)} file(s) are new or changed.")
+
+    processed = []
+    for file, fingerprint in pending.items():
+        entry = {**fingerprint, 'param_hash': param_hash, 'output_hash': output_hash}
+        try:
+            run(fpath_in=file, condition=resolve_condition(file, condition), **kwargs)
+        except Exception as e:
+            if not skip_errors:
+                raise
+            print(f"Failed to process {file}: {e!r}")
+            entry['error'] = repr(e)
+        else:
+            processed.append(file)
+        entry['processed_at'] = datetime.now(timezone.utc).isoformat()
+        entries[os.path.abspath(file)] = entry
+        save_manifest(entries, manifest)
+
+    return processed
+
+def watch(dir: str | os.PathLike="../data/01_raw/",
+          manifest: str | os.PathLike=MANIFEST, interval: float=30,
+          **kwargs) -> None:
+    """Poll a directory and process files as they arrive.
+
+    A file is only processed once its size and modification time are
+    unchanged between two polls, so files still being written are skipped.
+    Files that fail are logged and skipped until they change (see
+    `run_incremental()`); errors of a poll do not stop watching.
+    Stop with Ctrl+C.
+
+    Args:
+        dir (str | os.PathLike, optional): Directory. Defaults to "../data/01_raw/".
+        manifest (str | os.PathLike, optional): Manifest path.
+            Defaults to "../data/02_intermediate/manifest.json".
+        interval (float, optional): Seconds between polls. Defaults to 30.
+        **kwargs: Passed to `AnalyzeSingle.run()`.
+    """
+    previous = {}
+    try:
+        while True:
+            current = {}
+            for file in list_files(dir):
+                try:
+                    stat = os.stat(file)
+                except FileNotFoundError:  # removed since listing
+                    continue
+                current[file] = (stat.st_size, stat.st_mtime)
+
+            settled = [f for f, s in current.items() if previous.get(f) == s]
+            if settled:
+                try:
+                    run_incremental(settled, manifest, skip_errors=True, **kwargs)
+                except Exception as e:
+                    print(f"Poll failed, retrying in {interval} s: {e!r}")
 
+            previous = current
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
 
 if __name__ == "__main__":
-    files = list_files()
-    run_batch(files)
+    if "--watch" in sys.argv:
+        watch()
+    elif "--pipelined" in sys.argv:
+        run_pipelined(list_files())
+    elif "--incremental" in sys.argv:
+        run_incremental(list_files())
+    else:
+        files = list_files()
+        run_batch(files)
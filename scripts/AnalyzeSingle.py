@@ -1,12 +1,14 @@
 """Analyze single neuron output file.
 """
+import inspect
 import os
+from datetime import datetime, timezone
 from typing import Tuple
 
 import pandas as pd
 
 from vitrocal.analyzers import StandardAnalyzer
-from vitrocal.datasets import ExcelDataset
+from vitrocal.datasets import ExcelDataset, ResultsStore
 from vitrocal.detectors import StandardExtractor
 from vitrocal.preprocessors import StandardPreprocessor
 
@@ -49,11 +51,14 @@ def extract(df: pd.DataFrame, window, fps, threshold) -> dict:
 
     return extractor.detect_and_extract(df)
 
-def analyze(events: dict, upper_decay_bound, lower_decay_bound) -> pd.DataFrame:
+def analyze(events: dict, upper_decay_bound, lower_decay_bound,
+            compact=False, float_dtype='float64') -> pd.DataFrame:
     """Implement `vitrocal.analyzers.StandardAnalyzer.analyze()`"""
     analyzer = StandardAnalyzer(
         upper_decay_bound=upper_decay_bound,
-        lower_decay_bound=lower_decay_bound
+        lower_decay_bound=lower_decay_bound,
+        compact=compact,
+        float_dtype=float_dtype
     )
 
     return analyzer.analyze(events)
@@ -68,15 +73,29 @@ def save_data(df: pd.DataFrame,
     Args:
         df (pd.DataFrame): Analyzed events.
         fname (str | os.PathLike): File name (with extension).
-            `.xlsx` will be coerced to `.csv` unless format='excel'.
+            `.xlsx` will be coerced to `.csv` (or `.parquet`) unless format='excel'.
         fpath (str | os.PathLike, optional): File path.
             Defaults to "../data/02_intermediate/".
-        format: (str): Accepts 'excel' or 'csv.
+        format: (str): Accepts 'excel', 'csv' or 'parquet'. Parquet keeps the
+            dtypes of `StandardAnalyzer(compact=True)` output.
+
+    Raises:
+        ImportError: format='parquet' requires `pyarrow` (`vitrocal[parquet]`).
     """
     fpath = os.path.join(fpath, fname)
+    excel_ext = ".xlsx"
+    if format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "Writing Parquet files requires pyarrow: pip install vitrocal[parquet]"
+            ) from e
+        if excel_ext in fpath:
+            fpath = fpath.replace(excel_ext, ".parquet")
+        df.to_parquet(fpath, index=False, engine='pyarrow')
     # coerce .xlsx to csv
-    if format != 'excel':
-        excel_ext = ".xlsx"
+    elif format != 'excel':
         if excel_ext in fpath:
             fpath = fpath.replace(excel_ext, ".csv")
         df.to_csv(fpath, index=False)
@@ -84,31 +103,103 @@ def save_data(df: pd.DataFrame,
         df.to_excel(fpath, index=False)
 
 
+def process(df: pd.DataFrame, fps: float=1/2.5, filter_frequency: float=None,
+            preprocess_window_size: float=60,
+            baseline_threshold: float=10, bleach_period: float=60,
+            detection_window: Tuple[int]=(3, 30), detection_threshold: float=20,
+            upper_decay_bound: float=0.8, lower_decay_bound: float=0.2,
+            compact: bool=False, float_dtype: str='float64'
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Preprocess, extract, and analyze a loaded input file.
+
+    See `vitrocal` for details.
+    """
+    df = preprocess(df, fps, bleach_period, filter_frequency,
+                    baseline_threshold, preprocess_window_size)
+    extracted_data = extract(df, detection_window, fps, detection_threshold)
+    return analyze(extracted_data, upper_decay_bound, lower_decay_bound,
+                   compact, float_dtype)
+
+def analysis_params(load_args: dict={'header': None}, **kwargs) -> dict:
+    """Collect the full parameter set of a run, including defaults.
+
+    Args:
+        load_args (dict, optional): Passed to `pd.read_excel()`.
+            Defaults to {'header': None}.
+        **kwargs: Passed to `process()`.
+
+    Returns:
+        dict: Parameters.
+    """
+    bound = inspect.signature(process).bind(None, **kwargs)
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    params.pop('df')
+    return {'load_args': load_args, **params}
+
+def write(results: pd.DataFrame, avg_results: pd.DataFrame,
+          fname: str | os.PathLike, fpath_in: str | os.PathLike,
+          fpath_out: str | os.PathLike = "../data/02_intermediate/",
+          average=True, store: str | os.PathLike=None, condition: str=None,
+          params: dict=None, started_at: str=None, format: str='excel'
+) -> None:
+    """Write analysis output to files or to a `ResultsStore`.
+
+    See `run()` for details.
+    """
+    if store is not None:
+        ResultsStore.ResultsStore(store).save(
+            results, avg_results, fpath_in, params=params,
+            condition=condition, started_at=started_at
+        )
+        return
+
+    save_data(results, fname, fpath_out, format=format)
+
+    if average:
+        fname_avg = fname.replace(".xlsx", "_avg.xlsx")
+        save_data(avg_results, fname_avg, fpath_out, format=format)
+
 def run(fpath_in: str | os.PathLike, load_args: dict={'header': None},
         fps: float=1/2.5, filter_frequency: float=None,
         preprocess_window_size: float=60,
         baseline_threshold: float=10, bleach_period: float=60,
         detection_window: Tuple[int]=(3, 30), detection_threshold: float=20,
         upper_decay_bound: float=0.8, lower_decay_bound: float=0.2,
+        compact: bool=False, float_dtype: str='float64',
         fpath_out: str | os.PathLike = "../data/02_intermediate/",
-        average=True
+        average=True, store: str | os.PathLike=None, condition: str=None,
+        format: str='excel'
 ) -> None:
     """Produce analysis output for single input file.
 
+    If `store` is given, results are appended to the `ResultsStore` at that
+    path (together with `condition` and the analysis parameters) instead of
+    being written to `fpath_out` in `format` (see `save_data()`). With
+    `compact`, results follow the `vitrocal.analyzers` schemas; use
+    format='parquet' to keep their dtypes on disk.
+
     See `vitrocal` for details.
     """
-
+    process_args = {
+        'fps': fps, 'filter_frequency': filter_frequency,
+        'preprocess_window_size': preprocess_window_size,
+        'baseline_threshold': baseline_threshold, 'bleach_period': bleach_period,
+        'detection_window': detection_window,
+        'detection_threshold': detection_threshold,
+        'upper_decay_bound': upper_decay_bound,
+        'lower_decay_bound': lower_decay_bound,
+        'compact': compact, 'float_dtype': float_dtype
+    }
+
+    started_at = datetime.now(timezone.utc).isoformat()
     df, fname = load_data(fpath_in, load_args=load_args)
-    df = preprocess(df, fps, bleach_period, filter_frequency,
-                    baseline_threshold, preprocess_window_size)
-    extracted_data = extract(df, detection_window, fps, detection_threshold)
-    results, avg_results = analyze(extracted_data, upper_decay_bound, lower_decay_bound)
+    results, avg_results = process(df, **process_args)
 
-    save_data(results, fname, fpath_out)
-
-    if average:
-        fname_avg = fname.replace(".xlsx", "_avg.xlsx")
-        save_data(avg_results, fname_avg, fpath_out)
+    write(results, avg_results, fname, fpath_in, fpath_out=fpath_out,
+          average=average, store=store, condition=condition,
+          params=analysis_params(load_args, **process_args),
+          started_at=started_at, format=format)
 
 
 if __name__ == "__main__":
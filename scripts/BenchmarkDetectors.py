@@ -0,0 +1,132 @@
+"""Benchmark event detectors on synthetic calcium traces.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from vitrocal.detectors import DeconvolutionDetector, DerivativeDetector
+
+
+def simulate(n_rois: int=200, n_frames: int=3000, fps: float=10,
+             rate: float=0.05, amplitude: float=50, decay_time: float=1.5,
+             noise: float=5, seed: int=0) -> tuple:
+    """Simulate ΔF/F traces from an AR(1) calcium model.
+
+    Args:
+        n_rois (int, optional): Number of traces. Defaults to 200.
+        n_frames (int, optional): Number of frames. Defaults to 3000.
+        fps (float, optional): Frames per second. Defaults to 10.
+        rate (float, optional): Spike rate (Hz). Defaults to 0.05.
+        amplitude (float, optional): Mean spike amplitude (% ΔF/F). Defaults to 50.
+        decay_time (float, optional): Calcium decay time constant (s). Defaults to 1.5.
+        noise (float, optional): Noise standard deviation (% ΔF/F). Defaults to 5.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: m (images) x n (trace) ΔF/F dataframe.
+        np.ndarray: Boolean m x n array of true spike frames.
+    """
+    rng = np.random.default_rng(seed)
+    spikes = rng.random((n_frames, n_rois)) < rate / fps
+    sizes = spikes * rng.gamma(4, amplitude / 4, (n_frames, n_rois))
+
+    g = np.exp(-1 / (decay_time * fps))
+    calcium = np.zeros((n_frames, n_rois))
+    calcium[0] = sizes[0]
+    for t in range(1, n_frames):
+        calcium[t] = g * calcium[t - 1] + sizes[t]
+
+    data = pd.DataFrame(calcium + rng.normal(0, noise, calcium.shape))
+    return data, spikes
+
+def score(detected: np.ndarray, truth: np.ndarray, tolerance: int=2) -> dict:
+    """Match detected onsets to true spikes within a tolerance.
+
+    Consecutive detected frames count as a single onset.
+
+    Args:
+        detected (np.ndarray): Boolean m x n array of detections.
+        truth (np.ndarray): Boolean m x n array of true spike frames.
+        tolerance (int, optional): Maximum offset (frames). Defaults to 2.
+
+    Returns:
+        dict: Precision, recall and F1 score.
+    """
+    onsets = detected & ~np.vstack([np.zeros((1, detected.shape[1]), bool), detected[:-1]])
+
+    def _dilate(x):
+        out = x.copy()
+        for shift in range(1, tolerance + 1):
+            out[shift:] |= x[:-shift]
+            out[:-shift] |= x[shift:]
+        return out
+
+    hits = (onsets & _dilate(truth)).sum()
+    found = (truth & _dilate(onsets)).sum()
+    precision = hits / max(onsets.sum(), 1)
+    recall = found / max(truth.sum(), 1)
+    f1 = 2 * precision * recall / max(precision + recall, 1e-12)
+
+    return {'precision': precision, 'recall': recall, 'f1': f1}
+
+def run(fps: float=10, decay_time: float=1.5, **kwargs) -> pd.DataFrame:
+    """Compare detector accuracy and runtime on one simulated recording.
+
+    Args:
+        fps (float, optional): Frames per second. Defaults to 10.
+        decay_time (float, optional): Calcium decay time constant (s). Defaults to 1.5.
+        **kwargs: Passed to `simulate()`.
+
+    Returns:
+        pd.DataFrame: One row per detector.
+    """
+    data, truth = simulate(fps=fps, decay_time=decay_time, **kwargs)
+    detectors = {
+        'derivative': DerivativeDetector(threshold=20),
+        'deconvolution': DeconvolutionDetector(),
+        'deconvolution (known decay)': DeconvolutionDetector(
+            decay_time=decay_time, frames_per_second=fps),
+    }
+
+    rows = []
+    for name, detector in detectors.items():
+        start = time.perf_counter()
+        detected = detector.detect(data).to_numpy()
+        elapsed = time.perf_counter() - start
+        rows.append({'detector': name, 'seconds': elapsed, **score(detected, truth)})
+
+    return pd.DataFrame(rows)
+
+def time_detectors(n_rois: tuple=(200, 1000, 5000), n_frames: int=6000,
+                   **kwargs) -> pd.DataFrame:
+    """Time the detectors on recordings with increasing numbers of ROIs.
+
+    Args:
+        n_rois (tuple, optional): Numbers of traces. Defaults to (200, 1000, 5000).
+        n_frames (int, optional): Number of frames. Defaults to 6000.
+        **kwargs: Passed to `simulate()`.
+
+    Returns:
+        pd.DataFrame: Runtime (seconds) per detector and number of ROIs.
+    """
+    detectors = {
+        'derivative': DerivativeDetector(threshold=20),
+        'deconvolution': DeconvolutionDetector(),
+    }
+
+    rows = []
+    for n in n_rois:
+        data, _ = simulate(n_rois=n, n_frames=n_frames, **kwargs)
+        for name, detector in detectors.items():
+            start = time.perf_counter()
+            detector.detect(data)
+            rows.append({'detector': name, 'rois': n, 'frames': n_frames,
+                         'seconds': time.perf_counter() - start})
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(run().to_string(index=False))
+    print(time_detectors().to_string(index=False))
@@ -0,0 +1,106 @@
+"""Tests for the incremental batch analysis in scripts/AnalyzeBatch.py."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+
+import AnalyzeBatch  # noqa: E402
+from vitrocal.datasets.ResultsStore import hash_params  # noqa: E402
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for name in ('a.xlsx', 'b.xlsx'):
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Replace `run()` by a recorder; files named 'bad*' fail."""
+    calls = []
+
+    def _run(fpath_in, **kwargs):
+        calls.append(fpath_in)
+        if Path(fpath_in).name.startswith('bad'):
+            raise ValueError("unreadable")
+
+    monkeypatch.setattr(AnalyzeBatch, 'run', _run)
+    return calls
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return str(tmp_path / 'manifest.json')
+
+
+def test_hash_params_normalizes_numbers():
+    assert hash_params({'fps': 2, 'window': (3, 30)}) == hash_params({'fps': 2.0, 'window': [3.0, 30.0]})
+    assert hash_params({'fps': 2}) != hash_params({'fps': 2.5})
+
+
+def test_param_hash_fills_defaults_and_ignores_output():
+    assert AnalyzeBatch._param_hash({}) == AnalyzeBatch._param_hash(
+        {'fps': 1 / 2.5, 'bleach_period': 60, 'load_args': {'header': None}}
+    )
+    assert AnalyzeBatch._param_hash({'fps': 2}) == AnalyzeBatch._param_hash({'fps': 2.0})
+    assert AnalyzeBatch._param_hash({}) == AnalyzeBatch._param_hash({'condition': 'x'})
+
+
+def test_unchanged_files_are_skipped(files, calls, manifest):
+    assert AnalyzeBatch.run_incremental(files, manifest, fps=2) == files
+    assert AnalyzeBatch.run_incremental(files, manifest, fps=2.0) == []
+    assert AnalyzeBatch.list_pending(files, AnalyzeBatch.load_manifest(manifest), fps=2) == []
+    assert calls == files
+
+
+def test_changed_files_and_parameters_are_reprocessed(files, calls, manifest):
+    AnalyzeBatch.run_incremental(files, manifest)
+    Path(files[0]).write_bytes(b'changed')
+
+    assert AnalyzeBatch.run_incremental(files, manifest) == [files[0]]
+    assert AnalyzeBatch.run_incremental(files, manifest, detection_threshold=10) == files
+
+
+def test_new_output_target_is_reprocessed(files, calls, manifest, tmp_path):
+    AnalyzeBatch.run_incremental(files, manifest, fpath_out=str(tmp_path))
+
+    assert AnalyzeBatch.run_incremental(files, manifest, fpath_out=str(tmp_path)) == []
+    assert AnalyzeBatch.run_incremental(files, manifest, store=str(tmp_path / 'r.db')) == files
+    assert AnalyzeBatch.run_incremental(
+        files, manifest, store=str(tmp_path / 'r.db'), condition='x'
+    ) == []
+    assert AnalyzeBatch.run_incremental(
+        files, manifest, fpath_out=str(tmp_path), format='csv'
+    ) == files
+
+
+def test_failed_files_are_recorded_and_not_retried(files, calls, manifest, tmp_path):
+    bad = tmp_path / 'bad.xlsx'
+    bad.write_bytes(b'bad')
+    file_list = files + [str(bad)]
+
+    assert AnalyzeBatch.run_incremental(file_list, manifest, skip_errors=True) == files
+    assert 'error' in AnalyzeBatch.load_manifest(manifest)[str(bad)]
+
+    calls.clear()
+    assert AnalyzeBatch.run_incremental(file_list, manifest, skip_errors=True) == []
+    assert calls == []
+
+    bad.write_bytes(b'still bad')
+    AnalyzeBatch.run_incremental(file_list, manifest, skip_errors=True)
+    assert calls == [str(bad)]
+
+
+def test_errors_are_raised_without_skip_errors(files, calls, manifest, tmp_path):
+    bad = tmp_path / 'bad.xlsx'
+    bad.write_bytes(b'bad')
+
+    with pytest.raises(ValueError):
+        AnalyzeBatch.run_incremental([str(bad)] + files, manifest)
+    assert AnalyzeBatch.load_manifest(manifest) == {}
@@ -0,0 +1,41 @@
+"""Tests for vitrocal.analyzers."""
+import numpy as np
+import pytest
+
+from vitrocal.analyzers import StandardAnalyzer
+
+# rises linearly to a peak of 10 at frame 2 and falls back symmetrically
+TRIANGLE = {'roi_1': [np.array([0., 5., 10., 5., 0.])]}
+
+
+def test_find_event_kinetics_triangle():
+    analyzer = StandardAnalyzer(frames_per_second=1)
+    kinetics = analyzer.find_event_kinetics(TRIANGLE).iloc[0]
+
+    assert kinetics['time_to_peak'] == pytest.approx(2)
+    assert kinetics['rise_time'] == pytest.approx(1.6)  # 10% -> 90% of peak
+    assert kinetics['decay_time'] == pytest.approx(1.2)  # 80% -> 20% of peak
+    assert kinetics['fwhm'] == pytest.approx(2)
+    assert kinetics['auc'] == pytest.approx(20)
+
+
+def test_find_event_kinetics_scales_with_frame_rate():
+    analyzer = StandardAnalyzer(frames_per_second=2, kinetics=('rise_time', 'auc'))
+    kinetics = analyzer.find_event_kinetics(TRIANGLE)
+
+    assert list(kinetics.columns) == ['rise_time', 'auc']
+    assert kinetics.loc[0, 'rise_time'] == pytest.approx(0.8)
+    assert kinetics.loc[0, 'auc'] == pytest.approx(10)
+
+
+def test_analyze_appends_kinetics():
+    analyzer = StandardAnalyzer(frames_per_second=1, kinetics=('fwhm',))
+    results, _ = analyzer.analyze(TRIANGLE)
+
+    assert results.loc[0, 'peak'] == pytest.approx(10)
+    assert results.loc[0, 'fwhm'] == pytest.approx(2)
+
+
+def test_find_event_kinetics_requires_frame_rate():
+    with pytest.raises(ValueError):
+        StandardAnalyzer().find_event_kinetics(TRIANGLE)
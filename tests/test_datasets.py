@@ -0,0 +1,62 @@
+"""Tests for vitrocal.datasets."""
+import numpy as np
+import pytest
+
+from vitrocal.datasets.ImageStackDataset import ImageStackDataset
+
+
+@pytest.fixture
+def stack():
+    return np.random.default_rng(0).integers(0, 4096, (50, 12, 16)).astype(np.uint16)
+
+
+@pytest.fixture
+def labels():
+    labels = np.zeros((12, 16), dtype=np.int64)
+    labels[1:5, 2:7] = 3
+    labels[6:11, 8:15] = 7
+    labels[0, 15] = 9  # single-pixel ROI
+    return labels
+
+
+def _direct_mean(stack, labels):
+    return np.column_stack([
+        stack[:, labels == roi].mean(axis=1) for roi in np.unique(labels[labels > 0])
+    ])
+
+
+@pytest.mark.parametrize('block_frames', [1, 7, 256])
+def test_reduce_matches_direct_mean(stack, labels, block_frames):
+    traces = ImageStackDataset.reduce(stack, labels, block_frames)
+
+    assert list(traces.columns) == [3, 7, 9]
+    np.testing.assert_allclose(traces.to_numpy(), _direct_mean(stack, labels))
+
+
+def test_reduce_rejects_mismatched_labels(stack):
+    with pytest.raises(ValueError):
+        ImageStackDataset.reduce(stack, np.ones((5, 5), dtype=np.int64))
+
+
+def test_load_raw_stack(stack, labels, tmp_path):
+    stack.tofile(tmp_path / 'stack.raw')
+    np.save(tmp_path / 'labels.npy', labels)
+
+    traces = ImageStackDataset(tmp_path / 'stack.raw', {
+        'label_path': tmp_path / 'labels.npy', 'shape': (12, 16), 'block_frames': 8
+    }).load()
+
+    np.testing.assert_allclose(traces.to_numpy(), _direct_mean(stack, labels))
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+def test_load_tiff_stack(stack, labels, tmp_path, compression):
+    tifffile = pytest.importorskip('tifffile')
+    tifffile.imwrite(tmp_path / 'stack.tif', stack, compression=compression)
+    np.save(tmp_path / 'labels.npy', labels)
+
+    traces = ImageStackDataset(tmp_path / 'stack.tif', {
+        'label_path': tmp_path / 'labels.npy', 'block_frames': 8
+    }).load()
+
+    np.testing.assert_allclose(traces.to_numpy(), _direct_mean(stack, labels))
@@ -0,0 +1,68 @@
+"""Tests for vitrocal.detectors."""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import nnls
+
+from vitrocal.detectors import DeconvolutionDetector, _oasis_ar1
+
+
+def _convolve(spikes, g):
+    """AR(1) calcium trace c_t = g * c_{t-1} + s_t."""
+    calcium = np.zeros(len(spikes))
+    for t, s in enumerate(spikes):
+        calcium[t] = (g * calcium[t - 1] if t else 0) + s
+    return calcium
+
+
+@pytest.mark.parametrize('g', [0.5, 0.9, 0.97])
+def test_oasis_ar1_matches_nnls(g):
+    rng = np.random.default_rng(0)
+    n_frames = 200
+    spikes = rng.binomial(1, 0.05, n_frames) * rng.uniform(1, 3, n_frames)
+    y = _convolve(spikes, g) + rng.normal(0, 0.2, n_frames)
+
+    # calcium = kernel @ spikes, with kernel[t, j] = g ** (t - j) for t >= j
+    lags = np.subtract.outer(np.arange(n_frames), np.arange(n_frames))
+    kernel = np.where(lags >= 0, g ** np.maximum(lags, 0), 0)
+    expected, _ = nnls(kernel, y)
+
+    np.testing.assert_allclose(_oasis_ar1(y, g), expected, atol=1e-8)
+
+
+@pytest.mark.parametrize('penalty', [0, 0.3])
+def test_oasis_ar1_traces_are_independent(penalty):
+    rng = np.random.default_rng(2)
+    g = np.array([0.5, 0.8, 0.95, 0.99])
+    spikes = rng.binomial(1, 0.05, (300, 4)) * rng.uniform(1, 3, (300, 4))
+    y = np.column_stack([_convolve(spikes[:, i], g[i]) for i in range(4)])
+    y += rng.normal(0, 0.3, y.shape)
+
+    together = _oasis_ar1(y, g, penalty)
+    separately = np.column_stack([_oasis_ar1(y[:, i], g[i], penalty) for i in range(4)])
+
+    assert together.shape == y.shape
+    np.testing.assert_allclose(together, separately, atol=1e-10)
+
+
+def test_oasis_ar1_noiseless_trace_recovers_spikes():
+    spikes = np.zeros(100)
+    spikes[[10, 40, 41, 80]] = [2, 1, 3, 1.5]
+
+    np.testing.assert_allclose(_oasis_ar1(_convolve(spikes, 0.9), 0.9), spikes, atol=1e-10)
+
+
+def test_deconvolution_detector_finds_spikes():
+    rng = np.random.default_rng(1)
+    spikes = np.zeros((300, 3))
+    onsets = [50, 150, 250]
+    for roi, onset in enumerate(onsets):
+        spikes[onset, roi] = 5
+    traces = np.column_stack([_convolve(s, 0.9) for s in spikes.T])
+    data = pd.DataFrame(traces + rng.normal(0, 0.1, traces.shape))
+
+    detected = DeconvolutionDetector(g=0.9, n_jobs=1).detect(data)
+
+    for roi, onset in enumerate(onsets):
+        assert detected.iloc[onset, roi]
+    assert detected.to_numpy().sum() == len(onsets)
@@ -0,0 +1,93 @@
+"""Tests for vitrocal.preview."""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitrocal.base import BaseAnalyzer, BaseExtractor, BasePreprocessor
+from vitrocal.preview import ProgressivePreview
+
+
+class SlowPreprocessor(BasePreprocessor):
+    """Passes data through after `delay` seconds per ROI."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def preprocess(self, data):
+        self.calls += 1
+        time.sleep(self.delay * data.shape[1])
+        return data
+
+
+class MaxExtractor(BaseExtractor):
+    """One 'event' per ROI: its maximum."""
+    def extract(self, data, detected=None):
+        return {roi: [data[roi].max()] for roi in data.columns}
+
+    def detect_and_extract(self, data):
+        return self.extract(data)
+
+
+class CountAnalyzer(BaseAnalyzer):
+    def analyze(self, events):
+        return pd.DataFrame({'roi': list(events), 'peak': [v[0] for v in events.values()]})
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame(np.random.default_rng(0).normal(size=(50, 40)))
+
+
+def _preview(delay=0.0, **kwargs):
+    return ProgressivePreview(SlowPreprocessor(delay), MaxExtractor(), CountAnalyzer(),
+                              steps=(0.1, 0.5, 1.0), block_seconds=0.05, **kwargs)
+
+
+def test_refine_completes_all_steps(data):
+    preview = _preview(latency_budget=0)
+    preview.preview(data)
+    received = []
+    preview.refine(received.append).join()
+
+    assert [r['rois'] for r in preview.results] == [4, 20, 40]
+    assert [r['step'] for r in received] == [1, 2]
+    assert len(preview.results[-1]['output']) == 40
+
+
+def test_cancel_then_preview_leaves_no_running_worker(data):
+    preview = _preview(delay=0.01, latency_budget=0)
+    preview.preview(data)
+    worker = preview.refine()
+    time.sleep(0.1)
+
+    start = time.perf_counter()
+    preview.cancel()
+    assert time.perf_counter() - start < 0.05  # cancel() does not wait
+
+    preview.preview(data)
+    assert not worker.is_alive()
+
+
+def test_stale_results_are_discarded(data):
+    preview = _preview(delay=0.01, latency_budget=0)
+    preview.preview(data)
+    received = []
+    worker = preview.refine(received.append)
+    time.sleep(0.1)
+    preview.cancel()
+    worker.join()
+
+    assert received == []
+    assert len(preview.results) == 1
+
+
+def test_generations_use_pipeline_snapshots(data):
+    preview = _preview(latency_budget=0)
+    preview.preview(data)
+    preview.preprocessor.delay = 10  # edited while tuning
+    preview.refine().join()
+
+    assert preview.preprocessor.calls == 0
+    assert len(preview.results) == 3
@@ -0,0 +1,63 @@
+"""Tests for vitrocal.sketches."""
+import numpy as np
+import pytest
+
+from vitrocal.sketches import AverageEventSketch
+
+
+@pytest.fixture
+def matrices():
+    rng = np.random.default_rng(0)
+    first = rng.lognormal(0, 1, (300, 20)) * rng.choice([-1, 1], (300, 20))
+    second = rng.lognormal(1, 0.5, (200, 25))
+    second[:50, 15:] = np.nan  # shorter events
+    return first, second
+
+
+@pytest.mark.parametrize('q', [0.1, 0.25, 0.5, 0.75, 0.9])
+def test_merged_quantile_within_relative_accuracy(matrices, q):
+    first, second = matrices
+    sketch = AverageEventSketch(relative_accuracy=0.01)
+    sketch.update(first).merge(AverageEventSketch(relative_accuracy=0.01).update(second))
+
+    padded = np.full((len(first), second.shape[1]), np.nan)
+    padded[:, :first.shape[1]] = first
+    combined = np.vstack([padded, second])
+    exact = np.array([
+        np.quantile(column[~np.isnan(column)], q, method='lower')
+        for column in combined.T
+    ])
+
+    np.testing.assert_array_less(
+        np.abs(sketch.quantile(q) - exact), 0.01 * np.abs(exact) + 1e-12
+    )
+
+
+def test_merged_counts_and_means_are_exact(matrices):
+    first, second = matrices
+    sketch = AverageEventSketch().update(first).merge(AverageEventSketch().update(second))
+    summary = sketch.summary()
+
+    expected_count = np.concatenate([
+        np.full(first.shape[1], len(first)), np.zeros(5, dtype=int)
+    ]) + (~np.isnan(second)).sum(axis=0)
+    np.testing.assert_array_equal(summary['count'], expected_count)
+    np.testing.assert_allclose(
+        summary['mean'].iloc[:first.shape[1]],
+        np.nanmean(np.vstack([first, second[:, :first.shape[1]]]), axis=0)
+    )
+
+
+def test_merge_requires_same_settings():
+    with pytest.raises(ValueError):
+        AverageEventSketch(relative_accuracy=0.01).merge(
+            AverageEventSketch(relative_accuracy=0.05)
+        )
+
+
+def test_save_and_load(matrices, tmp_path):
+    sketch = AverageEventSketch().update(matrices[0])
+    sketch.save(tmp_path / 'sketch.npz')
+    loaded = AverageEventSketch.load(tmp_path / 'sketch.npz')
+
+    np.testing.assert_array_equal(loaded.quantile(0.5), sketch.quantile(0.5))
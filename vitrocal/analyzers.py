@@ -1,9 +1,59 @@
 """Module for analyzing extracted events.
 """
+from typing import Tuple
+
 import numpy as np
 import pandas as pd
+from scipy import sparse
 
 from .base import BaseAnalyzer
+from .sketches import AverageEventSketch
+
+# column -> dtype; 'float' resolves to `StandardAnalyzer.float_dtype`
+RESULTS_SCHEMA = {
+    'roi': 'category', 'event': 'int32', 'peak': 'float',
+    'upper': 'float', 'lower': 'float', 'decay': 'float'
+}
+AVERAGE_RESULTS_SCHEMA = {
+    'roi': 'category', 'total_events': 'int32',
+    'average_peak': 'float', 'average_decay': 'float'
+}
+AVERAGE_EVENT_SCHEMA = {
+    'q1': 'float', 'q3': 'float', 'median': 'float', 'mean': 'float'
+}
+EVENT_DATA_SCHEMA = {
+    'flourescence': 'float', 'index': 'int32', 'roi': 'category', 'event': 'int32'
+}
+
+
+def long_event_data(event_data: pd.DataFrame) -> pd.DataFrame:
+    """Convert wide event data to the long layout.
+
+    `StandardAnalyzer(compact=True).find_average_event()` returns event traces
+    as an events x index matrix; plotting and other consumers of the default
+    output expect one row per sample with 'flourescence', 'index' and 'roi'
+    columns. Long event data is returned unchanged.
+
+    Args:
+        event_data (pd.DataFrame): Event data from `find_average_event()`.
+
+    Returns:
+        pd.DataFrame: Long event data following `EVENT_DATA_SCHEMA`, with the
+            value dtype of the wide matrix.
+    """
+    if 'roi' in event_data.columns:
+        return event_data
+
+    values = event_data.to_numpy()
+    n_events, length = values.shape
+    long = pd.DataFrame({
+        'flourescence': values.ravel(),
+        'index': np.tile(np.arange(length), n_events),
+        'roi': event_data.index.get_level_values('roi').repeat(length),
+        'event': event_data.index.get_level_values('event').repeat(length),
+    })
+
+    return StandardAnalyzer(float_dtype=values.dtype).apply_schema(long, EVENT_DATA_SCHEMA)
 
 
 class StandardAnalyzer(BaseAnalyzer):
@@ -14,14 +64,41 @@ class StandardAnalyzer(BaseAnalyzer):
             upper bound. Defaults to 0.8.
         lower_decay_bound (float, optional): Proprtion of data to denote
             lower bound. Defaults to 0.2.
+        frames_per_second (float, optional): Image aquisition rate. Required
+            for `kinetics`. Defaults to None.
+        kinetics (tuple, optional): Kinetic features (seconds, or
+            ΔF/F x seconds for 'auc') added to the per-event results. Any of
+            'time_to_peak', 'rise_time', 'decay_time', 'fwhm' and 'auc'.
+            Defaults to None.
+        rise_bounds (Tuple[float, float], optional): Proportions of the peak
+            between which `rise_time` is measured. Defaults to (0.1, 0.9).
+        compact (bool, optional): Return results checked against the module
+            schemas, with categorical ROI keys and int32 event and index
+            columns, and `find_average_event()` event traces as a wide
+            events x index matrix (see `long_event_data()` for the default
+            layout). Defaults to False.
+        float_dtype (str, optional): Dtype of value columns if `compact`,
+            e.g. 'float32'. Defaults to 'float64'.
     """
+    KINETICS = ('time_to_peak', 'rise_time', 'decay_time', 'fwhm', 'auc')
+
     def __init__(self,
                  upper_decay_bound: float=0.8,
-                 lower_decay_bound: float=0.2
+                 lower_decay_bound: float=0.2,
+                 frames_per_second: float=None,
+                 kinetics: tuple=None,
+                 rise_bounds: Tuple[float, float]=(0.1, 0.9),
+                 compact: bool=False,
+                 float_dtype: str='float64'
     ):
 
         self.upper_decay_bound = upper_decay_bound
         self.lower_decay_bound = lower_decay_bound
+        self.frames_per_second = frames_per_second
+        self.kinetics = kinetics
+        self.rise_bounds = rise_bounds
+        self.compact = compact
+        self.float_dtype = float_dtype
 
 
     def analyze(self, events: dict, drop_inf=True) -> pd.DataFrame:
@@ -43,10 +120,63 @@ class StandardAnalyzer(BaseAnalyzer):
 
             results = pd.concat([results, tmp])
 
+        if self.kinetics:
+            kinetics = self.find_event_kinetics(events)
+            results = pd.concat([results.reset_index(drop=True), kinetics], axis=1)
+
         avg_results = self.find_average_decay(results)
 
+        if self.compact:
+            results = self.apply_schema(results, RESULTS_SCHEMA)
+            avg_results = self.apply_schema(avg_results, AVERAGE_RESULTS_SCHEMA)
+
         return results, avg_results
 
+    def apply_schema(self, df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+        """Check and cast a result table to a schema.
+
+        Columns outside the schema are kept; floating-point ones are cast to
+        `float_dtype`.
+
+        Args:
+            df (pd.DataFrame): Result table.
+            schema (dict): Column to dtype mapping, e.g. `RESULTS_SCHEMA`.
+
+        Raises:
+            ValueError: A schema column is missing or cannot be cast.
+
+        Returns:
+            pd.DataFrame: Result table with schema dtypes and a fresh index.
+        """
+        missing = [column for column in schema if column not in df.columns]
+        if missing:
+            raise ValueError(f"Result table is missing column(s): {missing}.")
+
+        df = df.reset_index(drop=True)
+        dtypes = {}
+        for column in df.columns:
+            dtype = schema.get(column)
+            if dtype is None:
+                try:
+                    is_float = pd.api.types.is_float_dtype(df[column].infer_objects())
+                except TypeError:
+                    is_float = False
+                dtype = 'float' if is_float else None
+            if dtype == 'float':
+                dtype = self.float_dtype
+            if dtype is not None:
+                dtypes[column] = dtype
+
+        for column, dtype in dtypes.items():
+            try:
+                df[column] = df[column].astype(dtype)
+            except (TypeError, ValueError) as e:
+                raise ValueError(
+                    f"Column '{column}' cannot be cast to {dtype}: {e}"
+                ) from e
+
+        return df
+
     def count_events(self, events: dict) -> dict:
         """Count number of events for each trace.
 
@@ -135,6 +265,108 @@ class StandardAnalyzer(BaseAnalyzer):
         return summary
 
 
+    def find_event_kinetics(self, events: dict) -> pd.DataFrame:
+        """Compute kinetic features of all events in one vectorized pass.
+
+        Events are stacked with `StandardAnalyzer.event_matrix()` and every
+        feature is derived from the shared peak and threshold crossings, which
+        are linearly interpolated between frames. Crossings that fall outside
+        the event window are reported as missing.
+
+        Args:
+            events (dict): Detected events from `StandardExtractor.detect_and_extract()`
+
+        Raises:
+            ValueError: `frames_per_second` is required and `kinetics` must
+                only contain known features.
+
+        Returns:
+            pd.DataFrame: One row per event, in the order of `analyze()`, with
+                one column per requested feature.
+        """
+        kinetics = tuple(self.kinetics or self.KINETICS)
+        unknown = set(kinetics) - set(self.KINETICS)
+        if unknown:
+            raise ValueError(f"Unknown kinetics: {sorted(unknown)}.")
+        if self.frames_per_second is None:
+            raise ValueError("frames_per_second is required to compute kinetics.")
+
+        matrix, _ = self.event_matrix(events)
+        n_events = len(matrix)
+        if n_events == 0:
+            return pd.DataFrame(columns=list(kinetics))
+
+        rows = np.arange(n_events)
+        observed = ~np.isnan(matrix)
+        lengths = observed.sum(axis=1)
+        peak_index = np.argmax(np.where(observed, matrix, -np.inf), axis=1)
+        peak = matrix[rows, peak_index]
+        dt = 1 / self.frames_per_second
+
+        def _rising(proportion):
+            return self._crossing(matrix, peak * proportion, peak_index, before=True)
+
+        def _falling(proportion):
+            return self._crossing(matrix, peak * proportion, peak_index, before=False)
+
+        features = {}
+        if 'time_to_peak' in kinetics:
+            features['time_to_peak'] = peak_index * dt
+        if 'rise_time' in kinetics:
+            low, high = self.rise_bounds
+            features['rise_time'] = (_rising(high) - _rising(low)) * dt
+        if 'decay_time' in kinetics:
+            features['decay_time'] = (_falling(self.lower_decay_bound)
+                                      - _falling(self.upper_decay_bound)) * dt
+        if 'fwhm' in kinetics:
+            features['fwhm'] = (_falling(0.5) - _rising(0.5)) * dt
+        if 'auc' in kinetics:
+            # trapezoidal rule: interior samples count fully, end samples half
+            first = matrix[:, 0]
+            last = matrix[rows, np.maximum(lengths - 1, 0)]
+            total = np.nansum(matrix, axis=1)
+            features['auc'] = (total - (first + last) / 2) * dt
+
+        return pd.DataFrame({k: features[k] for k in kinetics})
+
+    @staticmethod
+    def _crossing(matrix: np.ndarray, threshold: np.ndarray,
+                  peak_index: np.ndarray, before: bool) -> np.ndarray:
+        """Fractional frame at which each event crosses a threshold.
+
+        Args:
+            matrix (np.ndarray): Output from `StandardAnalyzer.event_matrix()`
+            threshold (np.ndarray): Threshold per event.
+            peak_index (np.ndarray): Peak frame per event.
+            before (bool): Find the last upward crossing before the peak if
+                True, otherwise the first downward crossing after the peak.
+
+        Returns:
+            np.ndarray: Interpolated crossing frame (NaN if not crossed).
+        """
+        n_events, length = matrix.shape
+        rows = np.arange(n_events)
+        frames = np.arange(length)
+        with np.errstate(invalid='ignore'):
+            below = matrix < threshold[:, None]
+
+        if before:
+            candidates = below & (frames < peak_index[:, None])
+            found = candidates.any(axis=1)
+            low = length - 1 - np.argmax(candidates[:, ::-1], axis=1)
+            high = np.minimum(low + 1, length - 1)
+        else:
+            candidates = below & (frames > peak_index[:, None])
+            found = candidates.any(axis=1)
+            high = np.argmax(candidates, axis=1)
+            low = np.maximum(high - 1, 0)
+
+        y_low, y_high = matrix[rows, low], matrix[rows, high]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = (threshold - y_low) / (y_high - y_low)
+
+        return np.where(found, low + fraction, np.nan)
+
     def find_average_decay(self, decay: pd.DataFrame) -> pd.DataFrame:
         """Return summary metrics for each event grouped by ROI.
 
@@ -188,6 +420,9 @@ class StandardAnalyzer(BaseAnalyzer):
             event_data: dataframe of events
         """
 
+        if self.compact:
+            return self._find_average_event_wide(events)
+
         # get maximum event duration
         max_length = 0
         for roi, data in events.items():
@@ -227,4 +462,465 @@ class StandardAnalyzer(BaseAnalyzer):
         global_average = _aggregate_events(event_data.drop(columns='roi').groupby('index'))
         roi_average = _aggregate_events(event_data.groupby(['roi', 'index']))
 
-        return global_average, roi_average.reset_index(), event_data
\ No newline at end of file
+        return global_average, roi_average.reset_index(), event_data
+
+    def _find_average_event_wide(self, events: dict) -> (pd.DataFrame, pd.DataFrame):
+        """Compact `find_average_event()` computed from the padded event matrix.
+
+        Args:
+            events: dictionary of events
+
+        Returns:
+            combined: combined dataframe of quantiles
+            event_data: wide dataframe of events, one row per event indexed by
+                ROI (categorical) and event number (int32), one column per
+                index; `long_event_data()` converts it to the default layout
+        """
+        matrix, rois = self.event_matrix(events)
+        counts = pd.Series(rois).groupby(rois, sort=False).cumcount() + 1
+        index = pd.MultiIndex.from_arrays(
+            [pd.Categorical(rois, categories=pd.unique(rois)),
+             counts.to_numpy(dtype=np.int32)],
+            names=['roi', 'event']
+        )
+        columns = pd.RangeIndex(matrix.shape[1], name='index')
+        event_data = pd.DataFrame(matrix.astype(self.float_dtype),
+                                  index=index, columns=columns)
+
+        def _aggregate_events(x: pd.DataFrame):
+            return pd.DataFrame({
+                'q1': x.quantile(.25),
+                'q3': x.quantile(.75),
+                'median': x.median(),
+                'mean': x.mean()
+            })
+
+        global_average = self.apply_schema(
+            _aggregate_events(event_data), AVERAGE_EVENT_SCHEMA
+        ).rename_axis('index')
+
+        grouped = event_data.groupby(level='roi', observed=True, sort=False)
+        roi_average = pd.DataFrame({
+            'q1': grouped.quantile(.25).stack(),
+            'q3': grouped.quantile(.75).stack(),
+            'median': grouped.median().stack(),
+            'mean': grouped.mean().stack()
+        }).reset_index()
+        roi_average = self.apply_schema(
+            roi_average, {'roi': 'category', 'index': 'int32', **AVERAGE_EVENT_SCHEMA}
+        )
+
+        return global_average, roi_average, event_data
+
+    def sketch_average_event(self, events: dict,
+                             sketch: AverageEventSketch=None) -> AverageEventSketch:
+        """Summarize events in a mergeable sketch for cross-file averages.
+
+        Sketches of several recordings (or worker processes) can be combined
+        with `AverageEventSketch.merge()`, and `AverageEventSketch.summary()`
+        then approximates `find_average_event()` over all of them in bounded
+        memory.
+
+        Args:
+            events (dict): Detected events from `StandardExtractor.detect_and_extract()`
+            sketch (AverageEventSketch, optional): Sketch to update. Defaults
+                to a new `AverageEventSketch()`.
+
+        Returns:
+            AverageEventSketch: Updated sketch.
+        """
+        if sketch is None:
+            sketch = AverageEventSketch()
+        matrix, _ = self.event_matrix(events)
+        return sketch.update(matrix)
+
+    def event_matrix(self, events: dict) -> Tuple[np.ndarray, np.ndarray]:
+        """Stack all events into a NaN-padded matrix.
+
+        Args:
+            events (dict): Detected events from `StandardExtractor.detect_and_extract()`
+
+        Returns:
+            np.ndarray: n (events) x max event length matrix.
+            np.ndarray: ROI label of each row.
+        """
+        sequences = [np.asarray(ev, dtype=np.float64)
+                     for data in events.values() for ev in data]
+        rois = np.array([roi for roi, data in events.items() for _ in data],
+                        dtype=object)
+        lengths = np.array([len(ev) for ev in sequences], dtype=np.int64)
+
+        matrix = np.full((len(sequences), lengths.max(initial=0)), np.nan)
+        if len(sequences):
+            mask = np.arange(matrix.shape[1]) < lengths[:, None]
+            matrix[mask] = np.concatenate(sequences)
+
+        return matrix, rois
+
+    def bootstrap_average_event(self, events: dict, n_boot: int=1000,
+                                ci: float=0.95, seed: int=None,
+                                max_block_bytes: int=2**28) -> pd.DataFrame:
+        """Bootstrap confidence band of the index-wise mean event.
+
+        All replicates are drawn at once as multinomial resampling counts, so
+        each replicate mean is a row of a single matrix product with the
+        padded event matrix. Replicates are processed in chunks that respect
+        `max_block_bytes`.
+
+        Args:
+            events (dict): Detected events from `StandardExtractor.detect_and_extract()`
+            n_boot (int, optional): Number of bootstrap replicates. Defaults to 1000.
+            ci (float, optional): Confidence level. Defaults to 0.95.
+            seed (int, optional): Seed for `np.random.default_rng()`. Defaults to None.
+            max_block_bytes (int, optional): Memory cap (bytes) for a chunk of
+                replicates. Defaults to 2**28 (256 MB).
+
+        Returns:
+            pd.DataFrame: Mean event with lower and upper confidence bounds
+                (`ci_low`, `ci_high`) per index; empty if there are no events.
+        """
+        matrix, _ = self.event_matrix(events)
+        n_events, length = matrix.shape
+        if n_events == 0:
+            return pd.DataFrame(
+                {'mean': [], 'ci_low': [], 'ci_high': []},
+                index=pd.RangeIndex(0, name='index'), dtype=np.float64
+            )
+
+        observed = ~np.isnan(matrix)
+        values = np.where(observed, matrix, 0)
+        observed = observed.astype(np.float64)
+
+        rng = np.random.default_rng(seed)
+        chunk = max(int(max_block_bytes // max((n_events + 2 * length) * 8, 1)), 1)
+        replicates = np.empty((n_boot, length))
+        for start in range(0, n_boot, chunk):
+            size = min(chunk, n_boot - start)
+            counts = rng.multinomial(n_events, np.full(n_events, 1 / n_events), size=size)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                replicates[start:start + size] = (counts @ values) / (counts @ observed)
+
+        alpha = (1 - ci) / 2
+        with np.errstate(invalid='ignore'):
+            bounds = np.nanquantile(replicates, [alpha, 1 - alpha], axis=0)
+
+        return pd.DataFrame({
+            'mean': np.nanmean(matrix, axis=0),
+            'ci_low': bounds[0],
+            'ci_high': bounds[1]
+        }, index=pd.RangeIndex(length, name='index'))
+
+    def bootstrap_roi_statistic(self, results: pd.DataFrame, column: str='decay',
+                                n_boot: int=1000, ci: float=0.95, seed: int=None,
+                                max_block_bytes: int=2**28) -> pd.DataFrame:
+        """Bootstrap confidence intervals of a per-event statistic's ROI mean.
+
+        Events of all ROIs are resampled together: per-ROI values are padded
+        into one matrix and resampled positions are drawn for every ROI and
+        replicate in a single vectorized operation, in chunks of replicates
+        that respect `max_block_bytes`.
+
+        Args:
+            results (pd.DataFrame): Per-event results from `StandardAnalyzer.analyze()`
+            column (str, optional): Statistic to summarize. Defaults to 'decay'.
+            n_boot (int, optional): Number of bootstrap replicates. Defaults to 1000.
+            ci (float, optional): Confidence level. Defaults to 0.95.
+            seed (int, optional): Seed for `np.random.default_rng()`. Defaults to None.
+            max_block_bytes (int, optional): Memory cap (bytes) for a chunk of
+                replicates. Defaults to 2**28 (256 MB).
+
+        Returns:
+            pd.DataFrame: Mean with lower and upper confidence bounds
+                (`ci_low`, `ci_high`) per ROI.
+        """
+        valid = results[['roi', column]].dropna()
+        rois, codes = np.unique(valid['roi'].to_numpy(), return_inverse=True)
+        counts = np.bincount(codes, minlength=len(rois))
+        max_count = counts.max(initial=0)
+
+        order = np.argsort(codes, kind='stable')
+        position = np.arange(len(codes)) - np.repeat(np.cumsum(counts) - counts, counts)
+        values = np.full((len(rois), max_count), np.nan)
+        values[codes[order], position] = valid[column].to_numpy(dtype=np.float64)[order]
+
+        rng = np.random.default_rng(seed)
+        # per resampled element: int64 position and gathered float64 value
+        bytes_per_draw = np.dtype(np.int64).itemsize + values.itemsize
+        chunk = max(int(max_block_bytes // max(len(rois) * max_count * bytes_per_draw, 1)), 1)
+        replicates = np.empty((n_boot, len(rois)))
+        rows = np.arange(len(rois))[None, :, None]
+        high = np.maximum(counts, 1)[:, None]
+        padding = np.arange(max_count) >= counts[:, None]  # each ROI draws its own count
+        for start in range(0, n_boot, chunk):
+            size = min(chunk, n_boot - start)
+            draws = rng.integers(0, high, size=(size, len(rois), max_count))
+            resampled = values[rows, draws]
+            del draws
+            resampled[:, padding] = 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                replicates[start:start + size] = resampled.sum(axis=2) / counts
+
+        alpha = (1 - ci) / 2
+        bounds = np.quantile(replicates, [alpha, 1 - alpha], axis=0)
+
+        return pd.DataFrame({
+            'roi': rois,
+            'mean': np.nanmean(values, axis=1),
+            'ci_low': bounds[0],
+            'ci_high': bounds[1]
+        })
+
+class SynchronyAnalyzer(BaseAnalyzer):
+    """Initialize population synchrony analyzer object.
+
+    Events are reduced to a sparse ROI x time-bin raster in which each
+    event contributes its peak frame. Network-level metrics are then computed
+    from the raster (and optionally the ΔF/F traces) with blocked matrix
+    products, so that pairwise metrics never require more than
+    `max_block_bytes` of working memory at once.
+
+    Attributes:
+        bin_size (int, optional): Width of a raster bin in frames.
+            Defaults to 1.
+        synchrony_threshold (float, optional): Minimum proportion of ROIs
+            active in a bin for the bin to belong to a synchronous burst.
+            Defaults to 0.2.
+        min_coactivation (int, optional): Minimum number of shared active
+            bins for a pair of ROIs to be reported. Defaults to 1.
+        correlation_threshold (float, optional): Minimum ΔF/F correlation
+            for a pair of ROIs to be reported. If None, all pairs are
+            reported. Defaults to 0.5.
+        max_block_bytes (int, optional): Memory cap (bytes) for a single
+            block of the pairwise computations. Defaults to 2**28 (256 MB).
+    """
+    def __init__(self,
+                 bin_size: int=1,
+                 synchrony_threshold: float=0.2,
+                 min_coactivation: int=1,
+                 correlation_threshold: float=0.5,
+                 max_block_bytes: int=2**28
+    ):
+
+        self.bin_size = bin_size
+        self.synchrony_threshold = synchrony_threshold
+        self.min_coactivation = min_coactivation
+        self.correlation_threshold = correlation_threshold
+        self.max_block_bytes = max_block_bytes
+
+
+    def analyze(self, events: dict, data: pd.DataFrame=None) -> pd.DataFrame:
+        """Return synchronous bursts and pairwise ROI metrics.
+
+        Args:
+            events (dict): Detected events from `StandardExtractor.detect_and_extract()`
+            data (pd.DataFrame, optional): m (images) x n (trace) ΔF/F dataframe
+                from `StandardPreprocessor.preprocess()`. If supplied, pairwise
+                cross-correlations are added. Defaults to None.
+
+        Returns:
+            pd.DataFrame: Synchronous bursts.
+            pd.DataFrame: Pairwise co-activation (and correlation) per ROI pair.
+        """
+        n_frames = None if data is None else len(data)
+        rois = None if data is None else list(data.columns)
+        raster, rois = self.build_raster(events, n_frames=n_frames, rois=rois)
+
+        bursts = self.detect_bursts(raster)
+        pairs = self.find_coactivation(raster, rois)
+
+        if data is not None:
+            correlation = self.find_cross_correlation(data)
+            pairs = pairs.merge(correlation, on=['roi_a', 'roi_b'], how='outer')
+
+        return bursts, pairs
+
+    def build_raster(self, events: dict, n_frames: int=None,
+                     rois: list=None) -> Tuple[sparse.csr_matrix, list]:
+        """Build a binary ROI x time-bin event raster.
+
+        Each event is placed at the frame of its peak. Overlapping events that
+        share a peak (e.g. consecutive threshold crossings) collapse into a
+        single raster entry.
+
+        Args:
+            events (dict): Detected events from `StandardExtractor.detect_and_extract()`
+            n_frames (int, optional): Recording length in frames. Defaults to
+                the latest event peak.
+            rois (list, optional): ROI order of the raster rows. Defaults to
+                the keys of `events`.
+
+        Returns:
+            sparse.csr_matrix: Binary raster (ROI x time bin).
+            list: ROI labels for each raster row.
+        """
+        if rois is None:
+            rois = list(events.keys())
+        row_lookup = {roi: i for i, roi in enumerate(rois)}
+
+        rows, frames = [], []
+        for roi, sequence in events.items():
+            if roi not in row_lookup:
+                continue
+            for event in sequence:
+                if len(event) == 0:
+                    continue
+                rows.append(row_lookup[roi])
+                frames.append(event.index[np.argmax(event.to_numpy())])
+
+        rows = np.asarray(rows, dtype=np.int64)
+        bins = np.asarray(frames, dtype=np.int64) // self.bin_size
+
+        if n_frames is None:
+            n_bins = int(bins.max()) + 1 if len(bins) else 0
+        else:
+            n_bins = (n_frames - 1) // self.bin_size + 1
+
+        raster = sparse.coo_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, bins)),
+            shape=(len(rois), n_bins)
+        ).tocsr()
+        raster.data[:] = 1  # collapse duplicate peaks
+
+        return raster, rois
+
+    def detect_bursts(self, raster: sparse.csr_matrix) -> pd.DataFrame:
+        """Identify synchronous bursts from the event raster.
+
+        Consecutive bins whose proportion of active ROIs reaches
+        `synchrony_threshold` are merged into a single burst.
+
+        Args:
+            raster (sparse.csr_matrix): Output from `SynchronyAnalyzer.build_raster()`
+
+        Returns:
+            pd.DataFrame: One row per burst with start and stop frames, the
+                number of participating ROIs and the peak active proportion.
+        """
+        columns = ['burst', 'start', 'stop', 'participating_rois', 'peak_fraction']
+        n_rois = raster.shape[0]
+        if n_rois == 0 or raster.shape[1] == 0:
+            return pd.DataFrame(columns=columns)
+
+        csc = raster.tocsc()
+        fraction = np.diff(csc.indptr) / n_rois
+        active = fraction >= self.synchrony_threshold
+
+        edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        stops = np.flatnonzero(edges == -1)
+
+        bursts = []
+        for count, (start, stop) in enumerate(zip(starts, stops), start=1):
+            participating = csc[:, start:stop].getnnz(axis=1) > 0
+            bursts.append({
+                'burst': count,
+                'start': start * self.bin_size,
+                'stop': stop * self.bin_size - 1,
+                'participating_rois': int(participating.sum()),
+                'peak_fraction': fraction[start:stop].max()
+            })
+
+        return pd.DataFrame(bursts, columns=columns)
+
+    def find_coactivation(self, raster: sparse.csr_matrix,
+                          rois: list) -> pd.DataFrame:
+        """Count shared active bins for each pair of ROIs.
+
+        The product `raster @ raster.T` is computed in blocks of rows so that
+        only pairs with at least `min_coactivation` shared bins are kept.
+
+        Args:
+            raster (sparse.csr_matrix): Output from `SynchronyAnalyzer.build_raster()`
+            rois (list): ROI labels for each raster row.
+
+        Returns:
+            pd.DataFrame: Pairwise co-activation counts and Jaccard index.
+        """
+        n_rois = raster.shape[0]
+        active_bins = np.asarray(raster.getnnz(axis=1))
+        raster_t = raster.T.tocsc()
+        block = self._block_rows(n_rois, n_rois * 8)
+
+        row_a, row_b, shared = [], [], []
+        for start in range(0, n_rois, block):
+            product = (raster[start:start + block] @ raster_t).tocoo()
+            rows = product.row + start
+            keep = (product.col > rows) & (product.data >= self.min_coactivation)
+            row_a.append(rows[keep])
+            row_b.append(product.col[keep])
+            shared.append(product.data[keep])
+
+        row_a = np.concatenate(row_a) if row_a else np.array([], dtype=np.int64)
+        row_b = np.concatenate(row_b) if row_b else np.array([], dtype=np.int64)
+        shared = np.concatenate(shared) if shared else np.array([], dtype=np.int64)
+
+        labels = np.asarray(rois, dtype=object)
+        union = active_bins[row_a] + active_bins[row_b] - shared
+
+        return pd.DataFrame({
+            'roi_a': labels[row_a],
+            'roi_b': labels[row_b],
+            'coactive_bins': shared,
+            'jaccard': shared / np.where(union > 0, union, 1)
+        })
+
+    def find_cross_correlation(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Compute zero-lag Pearson correlation of ΔF/F between ROIs.
+
+        Traces are z-scored once and the correlation matrix is accumulated in
+        column blocks, keeping only pairs above `correlation_threshold`.
+
+        Args:
+            data (pd.DataFrame): m (images) x n (trace) ΔF/F dataframe.
+
+        Returns:
+            pd.DataFrame: Pairwise correlation for each reported ROI pair.
+        """
+        values = data.to_numpy(dtype=np.float64)
+        n_frames, n_rois = values.shape
+
+        std = np.nanstd(values, axis=0)
+        std[std == 0] = np.nan
+        z = np.nan_to_num((values - np.nanmean(values, axis=0)) / std)
+
+        block = self._block_rows(n_rois, n_rois * 8)
+        threshold = self.correlation_threshold
+
+        row_a, row_b, corr = [], [], []
+        for start in range(0, n_rois, block):
+            product = z[:, start:start + block].T @ z / max(n_frames, 1)
+            rows, cols = np.nonzero(
+                np.triu(np.ones_like(product, dtype=bool), k=start + 1)
+            )
+            values_block = product[rows, cols]
+            if threshold is not None:
+                keep = values_block >= threshold
+                rows, cols, values_block = rows[keep], cols[keep], values_block[keep]
+            row_a.append(rows + start)
+            row_b.append(cols)
+            corr.append(values_block)
+
+        row_a = np.concatenate(row_a) if row_a else np.array([], dtype=np.int64)
+        row_b = np.concatenate(row_b) if row_b else np.array([], dtype=np.int64)
+        corr = np.concatenate(corr) if corr else np.array([], dtype=np.float64)
+
+        labels = np.asarray(data.columns, dtype=object)
+
+        return pd.DataFrame({
+            'roi_a': labels[row_a],
+            'roi_b': labels[row_b],
+            'correlation': corr
+        })
+
+    def _block_rows(self, n_rows: int, row_bytes: int) -> int:
+        """Number of rows per block that respects `max_block_bytes`.
+
+        Args:
+            n_rows (int): Total number of rows.
+            row_bytes (int): Dense memory footprint of a single row.
+
+        Returns:
+            int: Rows per block (at least 1).
+        """
+        block = self.max_block_bytes // max(row_bytes, 1)
+        return int(min(max(block, 1), max(n_rows, 1)))
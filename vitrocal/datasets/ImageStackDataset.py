@@ -0,0 +1,191 @@
+"""ImageStackDataset class definition"""
+import os
+from pathlib import PurePosixPath
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from vitrocal.datasets.io import AbstractDataset
+
+_TIFF_EXTENSIONS = ('.tif', '.tiff')
+
+
+class _NotMappable(Exception):
+    """Image data cannot be memory-mapped."""
+
+
+def _import_tifffile():
+    """Import the optional `tifffile` dependency.
+
+    Raises:
+        ImportError: `tifffile` is not installed.
+
+    Returns:
+        module: The `tifffile` module.
+    """
+    try:
+        import tifffile
+    except ImportError as e:
+        raise ImportError(
+            "Reading TIFF files requires tifffile: pip install vitrocal[images]"
+        ) from e
+    return tifffile
+
+
+class _TiffPageStack:
+    """Read-only frames x height x width view of a TIFF file's pages.
+
+    Pages are decoded only when a range of frames is accessed, so stacks
+    that cannot be memory-mapped are still reduced block by block.
+    """
+    def __init__(self, tiff):
+        self._pages = tiff.pages
+        self.shape = (len(self._pages), *self._pages[0].shape[-2:])
+
+    def __getitem__(self, frames: slice) -> np.ndarray:
+        return np.stack([
+            self._pages[i].asarray().reshape(self.shape[1:])
+            for i in range(*frames.indices(self.shape[0]))
+        ])
+
+
+class ImageStackDataset(AbstractDataset):
+    """ImageStackDataset class.
+
+    Memory-maps a raw image stack (frames x height x width) and reduces it to
+    per-ROI mean traces using an ROI label image, in which every pixel holds
+    the integer label of its ROI (0 for background). Frames are read in blocks,
+    so stacks larger than memory can be reduced. The output has the same
+    layout as the Fiji Excel export: m (images) x n (trace), one column per
+    ROI label, and can be passed straight to `StandardPreprocessor`.
+
+    Uncompressed, contiguous TIFF files are memory-mapped. Compressed or
+    tiled TIFF files cannot be, so their pages are decoded `block_frames` at
+    a time instead, which is slower but keeps memory use equally bounded.
+    Each page must then hold a single frame.
+
+    Supported `load_args`:
+
+        label_path (str): Path to the label image (`.npy` or TIFF). Required.
+        dtype (str): Pixel type of a raw binary stack. Defaults to 'uint16'.
+        shape (tuple): (height, width) or (frames, height, width) of a raw
+            binary stack. Required unless the stack is a TIFF file.
+        offset (int): Header size (bytes) of a raw binary stack. Defaults to 0.
+        block_frames (int): Number of frames reduced at once. Defaults to 256.
+    """
+    def __init__(self, filepath:str, load_args={}):
+        self._filepath = PurePosixPath(filepath)
+        self._load_args = load_args
+
+    def load(self) -> pd.DataFrame:
+        """Loader function.
+
+        Returns:
+            pd.DataFrame: Per-ROI mean intensity traces.
+        """
+        labels = self._load_labels()
+        block_frames = self._load_args.get('block_frames', 256)
+        try:
+            stack = self._memmap_stack()
+        except _NotMappable:
+            with _import_tifffile().TiffFile(str(self._filepath)) as tiff:
+                return self.reduce(_TiffPageStack(tiff), labels, block_frames)
+        return self.reduce(stack, labels, block_frames)
+
+    def save(self):
+        """Save function. Not yet implemented.
+        """
+        raise(NotImplementedError)
+
+    @staticmethod
+    def reduce(stack: np.ndarray, labels: np.ndarray,
+               block_frames: int=256) -> pd.DataFrame:
+        """Reduce an image stack to per-ROI mean traces in blocks of frames.
+
+        Args:
+            stack (np.ndarray): frames x height x width array (may be a memmap).
+            labels (np.ndarray): height x width integer label image.
+            block_frames (int, optional): Number of frames reduced at once.
+                Defaults to 256.
+
+        Raises:
+            ValueError: `labels` must match the frame dimensions of `stack`.
+
+        Returns:
+            pd.DataFrame: m (images) x n (trace) dataframe of mean intensities.
+        """
+        if stack.shape[1:] != labels.shape:
+            raise ValueError("Label image must have the same height and width as the stack.")
+
+        flat_labels = labels.ravel()
+        pixels = np.flatnonzero(flat_labels > 0)
+        rois, columns = np.unique(flat_labels[pixels], return_inverse=True)
+
+        # pixel -> ROI averaging matrix, restricted to labelled pixels
+        counts = np.bincount(columns, minlength=len(rois))
+        weights = sparse.csr_matrix(
+            (1 / counts[columns], (np.arange(len(pixels)), columns)),
+            shape=(len(pixels), len(rois))
+        )
+
+        n_frames = stack.shape[0]
+        traces = np.empty((n_frames, len(rois)))
+        for start in range(0, n_frames, block_frames):
+            block = np.asarray(stack[start:start + block_frames])
+            block = block.reshape(len(block), -1)[:, pixels].astype(np.float64)
+            traces[start:start + len(block)] = (weights.T @ block.T).T
+
+        return pd.DataFrame(traces, columns=rois)
+
+    def _memmap_stack(self) -> np.ndarray:
+        """Memory-map the image stack.
+
+        Raises:
+            ValueError: `shape` is required for raw binary stacks.
+            _NotMappable: The TIFF file is compressed or not contiguous.
+
+        Returns:
+            np.ndarray: frames x height x width memory-mapped array.
+        """
+        fpath = str(self._filepath)
+        if fpath.lower().endswith(_TIFF_EXTENSIONS):
+            try:
+                stack = _import_tifffile().memmap(fpath, mode='r')
+            except ValueError as e:
+                raise _NotMappable(fpath) from e
+            return stack.reshape(-1, *stack.shape[-2:])
+
+        shape = self._load_args.get('shape')
+        if shape is None:
+            raise ValueError("load_args['shape'] is required for raw binary stacks.")
+
+        dtype = np.dtype(self._load_args.get('dtype', 'uint16'))
+        offset = self._load_args.get('offset', 0)
+        if len(shape) == 2:
+            frame_bytes = int(np.prod(shape)) * dtype.itemsize
+            n_frames = (os.path.getsize(fpath) - offset) // frame_bytes
+            shape = (n_frames, *shape)
+
+        return np.memmap(fpath, dtype=dtype, mode='r', offset=offset,
+                         shape=tuple(shape))
+
+    def _load_labels(self) -> np.ndarray:
+        """Load the ROI label image.
+
+        Raises:
+            ValueError: `label_path` is required.
+
+        Returns:
+            np.ndarray: height x width integer label image.
+        """
+        label_path = self._load_args.get('label_path')
+        if label_path is None:
+            raise ValueError("load_args['label_path'] is required.")
+
+        if str(label_path).lower().endswith(_TIFF_EXTENSIONS):
+            labels = _import_tifffile().imread(label_path)
+        else:
+            labels = np.load(label_path)
+
+        return np.asarray(labels).astype(np.int64)
@@ -0,0 +1,254 @@
+"""ResultsStore class definition"""
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import PurePosixPath
+
+import numpy as np
+import pandas as pd
+
+from vitrocal.datasets.io import AbstractDataset
+
+_TABLES = ('events', 'roi_summary')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file TEXT NOT NULL,
+    condition TEXT,
+    input_hash TEXT,
+    param_hash TEXT,
+    params TEXT,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_file ON runs (file);
+CREATE INDEX IF NOT EXISTS runs_condition ON runs (condition);
+CREATE INDEX IF NOT EXISTS runs_param_hash ON runs (param_hash);
+CREATE INDEX IF NOT EXISTS runs_input_hash ON runs (input_hash);
+CREATE TABLE IF NOT EXISTS events (run_id INTEGER NOT NULL REFERENCES runs (run_id));
+CREATE INDEX IF NOT EXISTS events_run_id ON events (run_id);
+CREATE TABLE IF NOT EXISTS roi_summary (run_id INTEGER NOT NULL REFERENCES runs (run_id));
+CREATE INDEX IF NOT EXISTS roi_summary_run_id ON roi_summary (run_id);
+"""
+
+
+def hash_file(fpath: str | os.PathLike, chunk_size: int=2**20) -> str:
+    """Compute the SHA-256 content hash of a file.
+
+    Args:
+        fpath (str | os.PathLike): File path.
+        chunk_size (int, optional): Bytes read at once. Defaults to 2**20.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(fpath, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _normalize(value):
+    """Normalize a parameter value for hashing.
+
+    Numbers become floats (so 2 and 2.0 are equal) and tuples become lists,
+    recursively.
+
+    Args:
+        value: Parameter value.
+
+    Returns:
+        Normalized value.
+    """
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    return value
+
+
+def hash_params(params: dict) -> str:
+    """Compute a stable hash of a parameter set.
+
+    Numeric values are compared by value, so `{'fps': 2}` and
+    `{'fps': 2.0}` have the same hash.
+
+    Args:
+        params (dict): JSON-serializable parameters.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+    encoded = json.dumps(_normalize(params), sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultsStore(AbstractDataset):
+    """Append-only SQLite store for analysis results.
+
+    Every call to `save()` records one run (input file, condition, parameters,
+    input hash and timestamps) in the `runs` table and appends its per-event
+    and per-ROI tables to `events` and `roi_summary`, keyed by `run_id`.
+    Runs are indexed by file, condition, input hash and parameter hash, so
+    aggregates across runs are answered by SQL instead of re-reading files.
+    Result columns are added to the tables as they first appear.
+    """
+    def __init__(self, filepath:str, load_args={}):
+        self._filepath = PurePosixPath(filepath)
+        self._load_args = load_args
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def load(self, sql: str=None, params: tuple=()) -> pd.DataFrame:
+        """Loader function.
+
+        Args:
+            sql (str, optional): SQL query. Defaults to all per-event results
+                joined with their run metadata.
+            params (tuple, optional): Query parameters. Defaults to ().
+
+        Returns:
+            pd.DataFrame: Query result.
+        """
+        if sql is None:
+            sql = "SELECT * FROM runs JOIN events USING (run_id)"
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def save(self, results: pd.DataFrame, avg_results: pd.DataFrame,
+             file: str | os.PathLike, params: dict=None, condition: str=None,
+             input_hash: str=None, started_at: str=None) -> int:
+        """Append the results of one run in a single transaction.
+
+        Args:
+            results (pd.DataFrame): Per-event results.
+            avg_results (pd.DataFrame): Per-ROI results.
+            file (str | os.PathLike): Input file of the run.
+            params (dict, optional): Analysis parameters. Defaults to None.
+            condition (str, optional): Experimental condition. Defaults to None.
+            input_hash (str, optional): Content hash of the input file.
+                Defaults to the hash of `file` if it exists.
+            started_at (str, optional): ISO timestamp at which the run started.
+                Defaults to None.
+
+        Returns:
+            int: `run_id` of the new run.
+        """
+        if input_hash is None and os.path.isfile(file):
+            input_hash = hash_file(file)
+        params = params or {}
+
+        run = (
+            os.path.basename(file), condition, input_hash, hash_params(params),
+            json.dumps(params, sort_keys=True, default=str), started_at,
+            datetime.now(timezone.utc).isoformat()
+        )
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (file, condition, input_hash, param_hash, "
+                "params, started_at, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                run
+            )
+            run_id = cursor.lastrowid
+            self._append(conn, 'events', results, run_id)
+            self._append(conn, 'roi_summary', avg_results, run_id)
+
+        return run_id
+
+    def aggregate(self, column: str, table: str='events', by: str='condition',
+                  aggfunc: str='avg', since: str=None) -> pd.DataFrame:
+        """Aggregate a result column across runs.
+
+        Args:
+            column (str): Result column, e.g. 'decay'.
+            table (str, optional): 'events' or 'roi_summary'. Defaults to 'events'.
+            by (str, optional): Run column to group by, e.g. 'condition',
+                'file' or 'param_hash'. Defaults to 'condition'.
+            aggfunc (str, optional): SQL aggregate ('avg', 'sum', 'min', 'max',
+                'count'). Defaults to 'avg'.
+            since (str, optional): Only include runs finished at or after this
+                ISO timestamp. Defaults to None.
+
+        Raises:
+            ValueError: Unknown table, column, grouping or aggregate.
+
+        Returns:
+            pd.DataFrame: One row per group with the aggregate and the number
+                of contributing runs (`n_runs`).
+        """
+        if table not in _TABLES:
+            raise ValueError(f"table must be one of {list(_TABLES)}.")
+        if aggfunc.lower() not in ('avg', 'sum', 'min', 'max', 'count'):
+            raise ValueError("aggfunc must be one of 'avg', 'sum', 'min', 'max', 'count'.")
+        with self._connect() as conn:
+            if column not in self._columns(conn, table):
+                raise ValueError(f"Unknown column '{column}' in '{table}'.")
+            if by not in self._columns(conn, 'runs'):
+                raise ValueError(f"Unknown run column '{by}'.")
+
+        where = "WHERE runs.finished_at >= ?" if since is not None else ""
+        params = (since,) if since is not None else ()
+        sql = (f'SELECT runs."{by}", {aggfunc}(t."{column}") AS "{aggfunc}_{column}", '
+               f'COUNT(DISTINCT runs.run_id) AS n_runs '
+               f'FROM runs JOIN "{table}" AS t USING (run_id) {where} '
+               f'GROUP BY runs."{by}"')
+
+        return self.load(sql, params)
+
+    @contextmanager
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the store for a single transaction.
+
+        Yields:
+            sqlite3.Connection: Connection, committed and closed on exit.
+        """
+        conn = sqlite3.connect(str(self._filepath), **self._load_args)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _columns(conn: sqlite3.Connection, table: str) -> list:
+        """List the columns of a table.
+
+        Args:
+            conn (sqlite3.Connection): Connection.
+            table (str): Table name.
+
+        Returns:
+            list: Column names.
+        """
+        return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+    def _append(self, conn: sqlite3.Connection, table: str,
+                df: pd.DataFrame, run_id: int) -> None:
+        """Append a result table, adding any new columns first.
+
+        Args:
+            conn (sqlite3.Connection): Connection.
+            table (str): Table name.
+            df (pd.DataFrame): Rows to append.
+            run_id (int): Run the rows belong to.
+        """
+        df = df.reset_index(drop=True).copy()
+        df.insert(0, 'run_id', run_id)
+
+        existing = self._columns(conn, table)
+        for column in df.columns:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}"')
+
+        df.to_sql(table, conn, if_exists='append', index=False)
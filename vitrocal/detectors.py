@@ -1,4 +1,5 @@
 """Detector and extractor classes for event detection and extraction."""
+from concurrent.futures import ProcessPoolExecutor
 from typing import Tuple
 
 import numpy as np
@@ -44,6 +45,242 @@ class DerivativeDetector(BaseDetector):
 
         return data.diff()
 
+def _oasis_ar1(y: np.ndarray, g: float | np.ndarray, penalty: float=0) -> np.ndarray:
+    """Infer non-negative spikes of AR(1) calcium traces with OASIS.
+
+    Solves `min 1/2 ||c - y||^2 + penalty * |s|_1` subject to
+    `s_t = c_t - g * c_{t-1} >= 0` in linear time by pooling adjacent
+    violators (Friedrich, Zhou & Paninski, 2017, PLoS Comput Biol).
+    All traces are processed together: the pool stacks of every trace are
+    kept as arrays, and each frame is added and violating pools are merged
+    for all traces at once with masked array operations. The Python loop
+    therefore runs once per frame (plus once per round of cascading merges),
+    not once per frame and trace.
+
+    Args:
+        y (np.ndarray): Fluorescence trace, or m (images) x n (trace) array,
+            with a baseline of zero.
+        g (float | np.ndarray): AR(1) coefficient (calcium decay per frame),
+            scalar or one per trace.
+        penalty (float, optional): Sparsity penalty. Defaults to 0.
+
+    Returns:
+        np.ndarray: Inferred spike amplitudes (same shape as `y`).
+    """
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    squeeze = y.ndim == 1
+    y = y.reshape(len(y), -1)  # frames x traces
+    n_frames, n_traces = y.shape
+    g = np.broadcast_to(np.asarray(g, dtype=np.float64), (n_traces,))
+    if n_frames == 0 or n_traces == 0:
+        return y.reshape(-1) if squeeze else y
+
+    y = y - penalty * (1 - g)
+    y[-1] -= penalty * g
+
+    # the last pool of every trace [value, weight, g ** length, length] ...
+    value, weight, decay = y[0].copy(), np.ones(n_traces), g.copy()
+    length = np.ones(n_traces, dtype=np.int64)
+    # ... and the pools before it, stacked per trace in flat arrays on top of
+    # a sentinel pool that never violates; `top` points to each stack's top
+    size = n_traces * (n_frames + 1)
+    values, weights = np.empty(size), np.empty(size)
+    decays, lengths = np.empty(size), np.empty(size, dtype=np.int64)
+    top = np.arange(n_traces) * (n_frames + 1)
+    values[top], weights[top], decays[top], lengths[top] = -np.inf, 0.0, 1.0, 0
+
+    def _push(traces):
+        """Move the last pool of `traces` onto their stacks."""
+        top[traces] += 1
+        idx = top[traces]
+        values[idx], weights[idx] = value[traces], weight[traces]
+        decays[idx], lengths[idx] = decay[traces], length[traces]
+
+    # the sentinel (-inf) makes unused lanes of the masked merges NaN
+    with np.errstate(invalid='ignore'):
+        for t in range(1, n_frames):
+            # a new frame either starts a pool or, if the last pool would imply
+            # a negative spike, is merged into it
+            merge = value * decay > y[t]
+            _push(np.flatnonzero(~merge))
+            merged_weight = weight + decay * decay
+            value = np.where(merge, (value * weight + y[t] * decay) / merged_weight, y[t])
+            weight = np.where(merge, merged_weight, 1.0)
+            decay = np.where(merge, decay * g, g)
+            length = np.where(merge, length + 1, 1)
+
+            # merging can make the pool below violate in turn; cascade on copies
+            # of the traces that merged and write them back once
+            active = np.flatnonzero(merge)
+            if not len(active):
+                continue
+            v, w, d = value[active], weight[active], decay[active]
+            n, i = length[active], top[active]
+            violates = np.ones(len(active), dtype=bool)
+            while True:
+                below_v, below_d = values[i], decays[i]
+                violates &= below_v * below_d > v
+                if not violates.any():
+                    break
+                below_w = weights[i]
+                merged_weight = below_w + w * below_d * below_d
+                v = np.where(violates, (below_v * below_w + v * w * below_d) / merged_weight, v)
+                w = np.where(violates, merged_weight, w)
+                d = np.where(violates, d * below_d, d)
+                n = np.where(violates, n + lengths[i], n)
+                i = i - violates
+            value[active], weight[active], decay[active] = v, w, d
+            length[active], top[active] = n, i
+
+    _push(np.arange(n_traces))
+    depth = top - np.arange(n_traces) * (n_frames + 1)
+
+    # expand pools to frames: c = max(value, 0) * g ** (frames since pool start)
+    level = np.arange(n_frames + 1)  # level 0 is the sentinel
+    kept = ((level >= 1) & (level <= depth[:, None])).ravel()
+    pool_lengths = lengths[kept]
+    offsets = np.arange(n_traces * n_frames) - np.repeat(
+        np.cumsum(pool_lengths) - pool_lengths, pool_lengths
+    )
+    calcium = (np.repeat(np.maximum(values[kept], 0), pool_lengths)
+               * np.repeat(np.repeat(g, depth), pool_lengths) ** offsets)
+    calcium = calcium.reshape(n_traces, n_frames).T
+
+    spikes = np.empty_like(calcium)
+    spikes[0] = calcium[0]
+    spikes[1:] = calcium[1:] - g * calcium[:-1]
+    spikes = np.maximum(spikes, 0)
+
+    return spikes.reshape(-1) if squeeze else spikes
+
+
+class DeconvolutionDetector(BaseDetector):
+    """Initialize deconvolution detector object.
+
+    Infers spikes under an AR(1) calcium model (`c_t = g * c_{t-1} + s_t`)
+    with non-negative deconvolution (OASIS), which runs in linear time and
+    processes all traces of a recording together (see `_oasis_ar1`). Frames
+    with an inferred spike of at least `min_snr` noise standard deviations
+    are reported as events.
+
+    Attributes:
+        g (float, optional): AR(1) coefficient. If None, estimated per trace
+            from `decay_time` or, failing that, from the autocovariance.
+            Defaults to None.
+        decay_time (float, optional): Calcium decay time constant (seconds),
+            used as `g = exp(-1 / (decay_time * frames_per_second))`.
+            Defaults to None.
+        frames_per_second (float, optional): Image aquisition rate. Required
+            for `decay_time`. Defaults to None.
+        penalty (float, optional): Sparsity penalty passed to OASIS.
+            Defaults to 0.
+        min_snr (float, optional): Minimum spike amplitude in units of the
+            estimated noise standard deviation. Defaults to 3.
+        n_jobs (int, optional): Number of processes across which traces are
+            split. Defaults to 1.
+    """
+
+    def __init__(self,
+                 g: float=None,
+                 decay_time: float=None,
+                 frames_per_second: float=None,
+                 penalty: float=0,
+                 min_snr: float=3,
+                 n_jobs: int=1):
+        self.g = g
+        self.decay_time = decay_time
+        self.frames_per_second = frames_per_second
+        self.penalty = penalty
+        self.min_snr = min_snr
+        self.n_jobs = n_jobs
+        self.amplitudes = None
+
+    def detect(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Deconvolve traces and detect inferred spikes.
+
+        Inferred amplitudes are kept in `amplitudes`.
+
+        Args:
+            data (pd.DataFrame): m (images) x n (trace) dataframe.
+
+        Returns:
+            pd.DataFrame: Indicator (Boolean) dataframe of the same dimensions as
+                input data.
+        """
+        spikes = self.deconvolve(data)
+        noise = self._estimate_noise(data.to_numpy(dtype=np.float64))
+        self.amplitudes = spikes
+
+        return spikes >= self.min_snr * noise
+
+    def deconvolve(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Infer spike amplitudes for every trace.
+
+        Args:
+            data (pd.DataFrame): m (images) x n (trace) dataframe.
+
+        Returns:
+            pd.DataFrame: Inferred spike amplitudes of the same dimensions as
+                input data.
+        """
+        values = data.to_numpy(dtype=np.float64)
+        g = self._estimate_g(values)
+
+        n_jobs = min(max(self.n_jobs, 1), max(values.shape[1], 1))
+        if n_jobs == 1:
+            spikes = _oasis_ar1(values, g, self.penalty)
+        else:
+            splits = np.array_split(np.arange(values.shape[1]), n_jobs)
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                parts = executor.map(
+                    _oasis_ar1,
+                    [values[:, idx] for idx in splits],
+                    [g[idx] for idx in splits],
+                    [self.penalty] * n_jobs
+                )
+                spikes = np.column_stack(list(parts))
+
+        return pd.DataFrame(spikes, index=data.index, columns=data.columns)
+
+    def _estimate_g(self, values: np.ndarray) -> np.ndarray:
+        """AR(1) coefficient per trace.
+
+        Args:
+            values (np.ndarray): m (images) x n (trace) array.
+
+        Returns:
+            np.ndarray: AR(1) coefficient per trace.
+        """
+        n_traces = values.shape[1]
+        if self.g is not None:
+            return np.full(n_traces, self.g)
+        if self.decay_time is not None:
+            g = np.exp(-1 / (self.decay_time * self.frames_per_second))
+            return np.full(n_traces, g)
+
+        # Yule-Walker style estimate from lags 1 and 2, which skips the
+        # white-noise contribution to the lag-0 autocovariance
+        centered = np.nan_to_num(values - np.nanmean(values, axis=0))
+        lag1 = np.sum(centered[1:] * centered[:-1], axis=0)
+        lag2 = np.sum(centered[2:] * centered[:-2], axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g = lag2 / lag1
+        return np.clip(np.nan_to_num(g), 0, 0.999)
+
+    def _estimate_noise(self, values: np.ndarray) -> np.ndarray:
+        """Noise standard deviation per trace from frame-to-frame differences.
+
+        Args:
+            values (np.ndarray): m (images) x n (trace) array.
+
+        Returns:
+            np.ndarray: Noise standard deviation per trace.
+        """
+        diff = np.diff(values, axis=0)
+        mad = np.nanmedian(np.abs(diff - np.nanmedian(diff, axis=0)), axis=0)
+        return mad / 0.6745 / np.sqrt(2)
+
+
 class StandardExtractor(BaseExtractor):
     """Initialize event extractor object.
 
@@ -53,16 +290,20 @@ class StandardExtractor(BaseExtractor):
         frames_per_second (int, optional): Image aquisition rate.. Defaults to None.
         threshold (float, optional):  Minimum percentile to identify an event.
             Passed to `BaseDetector()`. Defaults to 20.
+        detector (BaseDetector, optional): Detector used by
+            `detect_and_extract()`. Defaults to `DerivativeDetector(threshold)`.
     """
 
     def __init__(self,
                  window: Tuple[int],
                  frames_per_second: int=None,
-                 threshold: float=20
+                 threshold: float=20,
+                 detector: BaseDetector=None
     ):
         self.window = window
         self.frames_per_second = frames_per_second
         self.threshold = threshold
+        self.detector = detector
 
 
     def detect_and_extract(self, data: pd.DataFrame) -> dict:
@@ -74,7 +315,9 @@ class StandardExtractor(BaseExtractor):
         Returns:
             dict: Dictionary of events.
         """
-        detector = DerivativeDetector(threshold=self.threshold)
+        detector = self.detector
+        if detector is None:
+            detector = DerivativeDetector(threshold=self.threshold)
         detected = detector.detect(data)
 
         return self.extract(data, detected)
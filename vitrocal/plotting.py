@@ -5,26 +5,102 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from .analyzers import long_event_data
+
+def lttb_indices(y, n_out, x=None):
+
+    """
+    Selects points of a trace with largest-triangle-three-buckets decimation.
+
+    The first and last points are always kept; every other bucket keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, so peaks survive downsampling. Missing (NaN)
+    samples, such as the padding of event data, are dropped first.
+
+    Args:
+        y (array-like): Trace values.
+        n_out (int): Number of points to keep.
+        x (array-like): Sample positions. Defaults to 0..len(y)-1.
+
+    Returns:
+        ndarray: Sorted indices of the kept (non-missing) points.
+    """
+
+    y = np.asarray(y, dtype=float)
+    x = np.arange(len(y), dtype=float) if x is None else np.asarray(x, dtype=float)
+    valid = np.flatnonzero(~(np.isnan(y) | np.isnan(x)))
+    n = len(valid)
+    if n_out is None or n_out >= n or n_out < 3:
+        return valid
+    x, y = x[valid], y[valid]
+
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+    edges[-1] = n - 1
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        avg_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a])
+                      - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+
+    return valid[kept]
+
+
+def group_events(events_df):
+
+    """
+    Splits event data by ROI once, for repeated plotting.
+
+    Args:
+        events_df (DataFrame): A DataFrame with columns 'roi', 'index', and 'flourescence',
+            or the wide event data of `StandardAnalyzer(compact=True)`.
+
+    Returns:
+        dict: DataFrame of events for each ROI.
+    """
+
+    events_df = long_event_data(events_df)
+    return {roi: group for roi, group in events_df.groupby('roi', sort=False, observed=True)}
+
+
 def plot_events(events_df, roi=0, title='Detected Events for ROI', xlab='Time (s)', ylab='dF/F',
-    color='C0', ax=None):
+    color='C0', ax=None, max_points=None):
 
     """
     Plots the detected events for a given ROI.
 
     Args:
-        events_df (DataFrame): A DataFrame with columns 'roi', 'time', and 'flourescence'.
+        events_df (DataFrame or dict): A DataFrame with columns 'roi', 'time', and 'flourescence',
+            the wide event data of `StandardAnalyzer(compact=True)`, or the per-ROI split from
+            `group_events`, which avoids scanning all rows on every call.
         roi (int): The region of interest to plot.
         title (str): The title of the plot.
         xlab (str): The label for the x-axis.
         ylab (str): The label for the y-axis.
         color (str): The color of the line.
         ax (Axes): The axes to plot on. If None, a new figure is created.
+        max_points (int): If set, the trace is decimated to this many points with `lttb_indices`.
     """
 
     if ax is None:
         fig, ax = plt.subplots()
 
-    events = events_df[events_df['roi'] == roi]
+    if isinstance(events_df, dict):
+        events = events_df[roi]
+    else:
+        events_df = long_event_data(events_df)
+        events = events_df[events_df['roi'] == roi]
+
+    if max_points is not None:
+        events = events.iloc[lttb_indices(events['flourescence'], max_points)]
 
     ax.plot(events['index'], events['flourescence'], color=color)
 
@@ -33,27 +109,80 @@ def plot_events(events_df, roi=0, title='Detected Events for ROI', xlab='Time (s
     ax.set_title(title + ' ' + str(roi))
 
 
+def plot_raster(data, title='dF/F for all ROIs', xlab='Frame', ylab='ROI',
+    cmap='viridis', vmin=None, vmax=None, max_columns=2000, ax=None):
+
+    """
+    Plots all ROIs x time as a single heatmap.
+
+    Frames are max-pooled down to at most `max_columns` columns so that events
+    remain visible and the figure stays small regardless of recording length.
+
+    Args:
+        data (DataFrame): A m (images) x n (trace) DataFrame, e.g. from `StandardPreprocessor.preprocess`.
+        title (str): The title of the plot.
+        xlab (str): The label for the x-axis.
+        ylab (str): The label for the y-axis.
+        cmap (str): The colormap.
+        vmin (float): Lower limit of the color scale.
+        vmax (float): Upper limit of the color scale.
+        max_columns (int): Maximum number of time columns drawn.
+        ax (Axes): The axes to plot on. If None, a new figure is created.
+
+    Returns:
+        AxesImage: The heatmap, e.g. for `plt.colorbar`.
+    """
+
+    if ax is None:
+        fig, ax = plt.subplots()
+
+    values = np.asarray(data, dtype=float).T
+    n_rois, n_frames = values.shape
+
+    factor = max(int(np.ceil(n_frames / max_columns)), 1)
+    if factor > 1:
+        padded = np.full((n_rois, factor * int(np.ceil(n_frames / factor))), np.nan)
+        padded[:, :n_frames] = values
+        with np.errstate(all='ignore'):
+            values = np.fmax.reduce(padded.reshape(n_rois, -1, factor), axis=2)
+
+    image = ax.imshow(values, aspect='auto', interpolation='nearest', cmap=cmap,
+                      vmin=vmin, vmax=vmax, extent=(0, n_frames, n_rois, 0))
+
+    ax.set_xlabel(xlab)
+    ax.set_ylabel(ylab)
+    ax.set_title(title)
+
+    return image
+
+
 def plot_average_event(combined, title='Average Detected Event', ylabel='df/F', 
-                xlabel='Time', line_color='black', fill_color='C0', ax=None):
+                xlabel='Time', line_color='black', fill_color='C0', ax=None,
+                center='median', lower='q1', upper='q3'):
 
     """
     Plots the average detected event with the 25th and 75th percentiles shaded in.
 
     Args:
         combined (DataFrame): A DataFrame with columns 'median', 'q1', and 'q3'.
+            Pass `center='mean', lower='ci_low', upper='ci_high'` to plot the output of
+            `StandardAnalyzer.bootstrap_average_event` instead.
         title (str): The title of the plot.
         ylabel (str): The label for the y-axis.
         xlabel (str): The label for the x-axis.
         line_color (str): The color of the line.
         fill_color (str): The color of the fill.
         ax (Axes): The axes to plot on. If None, a new figure is created.
+        center (str): The column drawn as a line.
+        lower (str): The column bounding the shaded band from below.
+        upper (str): The column bounding the shaded band from above.
     """
 
     if ax is None:
         fig, ax = plt.subplots()
 
-    ax.plot(combined.index, combined['median'], linestyle='dashed', color=line_color)
-    ax.fill_between(combined.index, combined['q1'], combined['q3'], alpha=.25, color=fill_color)
+    ax.plot(combined.index, combined[center], linestyle='dashed', color=line_color)
+    ax.fill_between(combined.index, combined[lower], combined[upper], alpha=.25, color=fill_color)
 
     ax.set_title(title)
     ax.set_ylabel(ylabel)
@@ -23,6 +23,32 @@ class StandardPreprocessor(BasePreprocessor):
             Defaults to None.
         bleach_period (float, optional):
         Initial photobleaching period to be removed (seconds). Defaults to 60.
+        column_minimum (float, optional):
+            ROIs whose minimum intensity falls below this value are screened
+            out. Defaults to None.
+        min_variance (float, optional):
+            ROIs with intensity variance at or below this value (dead or
+            empty traces) are screened out. Defaults to None.
+        max_nan_fraction (float, optional):
+            ROIs with a larger proportion of missing frames are screened out.
+            Defaults to None.
+        saturation_value (float, optional):
+            Intensity at which the detector saturates. Defaults to None.
+        max_saturated_fraction (float, optional):
+            ROIs with a larger proportion of frames at or above
+            `saturation_value` are screened out. Defaults to 0.
+        screen_action (str, optional):
+            'drop' removes screened-out ROIs before filtering and baselining,
+            'flag' keeps them and only records them in `screening_report`.
+            Defaults to 'drop'.
+        baseline_decimation (int, optional):
+            If set, the baseline percentile is only computed every
+            `baseline_decimation` frames and linearly interpolated in between.
+            Defaults to None (exact baseline).
+        baseline_validation_rois (int, optional):
+            Number of ROIs on which the decimated baseline is compared with the
+            exact baseline. The deviation is stored in `baseline_error`.
+            Defaults to 5.
 
     """
 
@@ -33,7 +59,14 @@ class StandardPreprocessor(BasePreprocessor):
                  window_size: float=60,
                  baseline_threshold: float=None,
                  bleach_period: float=60,
-                 column_minimum: int=None
+                 column_minimum: float=None,
+                 min_variance: float=None,
+                 max_nan_fraction: float=None,
+                 saturation_value: float=None,
+                 max_saturated_fraction: float=0,
+                 screen_action: str='drop',
+                 baseline_decimation: int=None,
+                 baseline_validation_rois: int=5
         ):
 
         self.frames_per_second = frames_per_second
@@ -43,10 +76,19 @@ class StandardPreprocessor(BasePreprocessor):
         self.baseline_threshold = baseline_threshold
         self.bleach_period = bleach_period
         self.column_minimum = column_minimum
+        self.min_variance = min_variance
+        self.max_nan_fraction = max_nan_fraction
+        self.saturation_value = saturation_value
+        self.max_saturated_fraction = max_saturated_fraction
+        self.screen_action = screen_action
+        self.screening_report = None
+        self.baseline_decimation = baseline_decimation
+        self.baseline_validation_rois = baseline_validation_rois
+        self.baseline_error = None
 
 
     def preprocess(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Drop frames, filter, baseline, and compute flouresence change.
+        """Drop frames, screen ROIs, filter, baseline, and compute flouresence change.
 
         Args:
             data (pd.DataFrame): m (images) x n (trace) dataframe.
@@ -57,6 +99,7 @@ class StandardPreprocessor(BasePreprocessor):
         """
 
         data = self.drop_frames(data)
+        data = self.screen(data)
         data = self.filter(data)
         baseline = self.baseline(data)
         d_f = self.compute_fluoresence_change(data, baseline)
@@ -82,6 +125,78 @@ class StandardPreprocessor(BasePreprocessor):
                 .reset_index(drop=True)
         )
     
+    def screen(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Screen out dead, empty, or saturated ROIs.
+
+        Per-ROI minimum, variance, missing and saturated proportions are
+        computed in a single vectorized pass. The outcome for every ROI is
+        stored in `screening_report`.
+
+        Args:
+            data (pd.DataFrame): m (images) x n (trace) dataframe.
+
+        Raises:
+            ValueError: `screen_action` must be 'drop' or 'flag'.
+
+        Returns:
+            pd.DataFrame: Dataframe without screened-out traces (columns) if
+                `screen_action` is 'drop', otherwise `data` unchanged.
+        """
+        if self.screen_action not in ('drop', 'flag'):
+            raise ValueError("screen_action must be 'drop' or 'flag'.")
+
+        values = data.to_numpy(dtype=np.float64)
+        missing = np.isnan(values)
+        observed = (~missing).sum(axis=0)
+        has_values = observed > 0
+
+        # fill missing values so that reductions stay vectorized
+        minimum = np.where(missing, np.inf, values).min(axis=0)
+        total = np.where(missing, 0, values).sum(axis=0)
+        mean = total / np.where(has_values, observed, 1)
+        variance = (np.where(missing, 0, values - mean) ** 2).sum(axis=0)
+        variance = variance / np.where(has_values, observed, 1)
+        minimum[~has_values] = np.nan
+        variance[~has_values] = np.nan
+
+        report = pd.DataFrame({
+            'roi': data.columns,
+            'minimum': minimum,
+            'variance': variance,
+            'nan_fraction': missing.mean(axis=0) if len(values) else 1.0,
+        })
+        if self.saturation_value is not None:
+            saturated = (values >= self.saturation_value).sum(axis=0)
+            report['saturated_fraction'] = saturated / max(len(values), 1)
+
+        reasons = {'empty': ~has_values}
+        if self.column_minimum is not None:
+            reasons['below_minimum'] = minimum < self.column_minimum
+        if self.min_variance is not None:
+            reasons['low_variance'] = variance <= self.min_variance
+        if self.max_nan_fraction is not None:
+            reasons['missing'] = report['nan_fraction'].to_numpy() > self.max_nan_fraction
+        if self.saturation_value is not None:
+            reasons['saturated'] = (report['saturated_fraction'].to_numpy()
+                                    > self.max_saturated_fraction)
+
+        excluded = np.zeros(len(report), dtype=bool)
+        reason = np.full(len(report), '', dtype=object)
+        for name, flag in reasons.items():
+            excluded |= flag
+            reason = reason + np.where(flag, name + ', ', '')
+        report['excluded'] = excluded
+        report['reason'] = [r.rstrip(', ') for r in reason]
+
+        self.screening_report = report
+
+        n_excluded = int(report['excluded'].sum())
+        print(f"Screening excluded {n_excluded} of {len(report)} ROI(s).")
+
+        if self.screen_action == 'flag':
+            return data
+        return data.loc[:, ~report['excluded'].to_numpy()]
+
     def _construct_bessel_filter(self, filter_frequency:float, filter_order:int):
         """Apply scipy.signal.bessel filter.
 
@@ -101,7 +216,7 @@ class StandardPreprocessor(BasePreprocessor):
         """Apply filter object backward and forward.
 
         Args:
-            data (pd.DataFrame): ROI x image array.
+            data (pd.DataFrame): m (images) x n (trace) dataframe, filtered along time.
 
         Returns:
             pd.DataFrame: Filtered output in the same shape as `data`.
@@ -116,20 +231,26 @@ class StandardPreprocessor(BasePreprocessor):
                 self.filter_order
             )
 
-            filtered = filtfilt(b, a, data)
+            filtered = filtfilt(b, a, data, axis=0)
 
-            return pd.DataFrame(filtered)
+            return pd.DataFrame(filtered, index=data.index, columns=data.columns)
 
 
     def baseline(self, data: pd.DataFrame) -> pd.DataFrame:
         """ Identify baseline fluoresence using a backward-looking rolling window.
 
+        If `baseline_decimation` is set, the approximate decimated baseline is
+        returned instead (see `StandardPreprocessor.decimated_baseline()`).
+
         Args:
             data (pd.DataFrame): m (images) x n (trace) dataframe.
 
         Returns:
             pd.DataFrame: Dataframe with same dimensions as input data.
         """
+        if self.baseline_decimation is not None and self.baseline_decimation > 1:
+            return self.decimated_baseline(data)
+
         window_frames = int(self.window_size * self.frames_per_second)
 
         # turn this into a FixedBackwardwindowIndexer by reversing the dataframe
@@ -142,6 +263,152 @@ class StandardPreprocessor(BasePreprocessor):
         )
         return baseline.iloc[::-1]
 
+    def decimated_baseline(self, data: pd.DataFrame,
+                           max_block_bytes: int=2**27) -> pd.DataFrame:
+        """Approximate the rolling baseline on a decimated grid of frames.
+
+        The backward-looking windowed percentile is evaluated exactly every
+        `baseline_decimation` frames (and on the first `baseline_decimation`
+        and the last frame), then linearly
+        interpolated back to full resolution. On a deterministic sample of
+        `baseline_validation_rois` ROIs the result is compared with the exact
+        baseline and the maximum deviation is stored in `baseline_error`.
+
+        Args:
+            data (pd.DataFrame): m (images) x n (trace) dataframe.
+            max_block_bytes (int, optional): Memory cap (bytes) for the
+                windows evaluated at once. Defaults to 2**27 (128 MB).
+
+        Returns:
+            pd.DataFrame: Dataframe with same dimensions as input data.
+        """
+        window_frames = max(int(self.window_size * self.frames_per_second), 1)
+        step = self.baseline_decimation
+
+        values = data.to_numpy(dtype=np.float64)
+        n_frames, n_rois = values.shape
+        if n_frames == 0:
+            return data.astype(np.float64)
+
+        # the first `step` frames are evaluated densely, since percentiles of
+        # very short windows change quickly from one frame to the next
+        grid = np.union1d(
+            np.arange(0, n_frames, step),
+            np.arange(min(step, window_frames, n_frames))
+        )
+        if grid[-1] != n_frames - 1:
+            grid = np.append(grid, n_frames - 1)
+
+        grid_baseline = self._windowed_percentile(values, grid, window_frames,
+                                                  max_block_bytes)
+
+        # linear interpolation between grid points, shared by all ROIs
+        frames = np.arange(n_frames)
+        right = np.clip(np.searchsorted(grid, frames), 1, len(grid) - 1)
+        left = right - 1
+        if len(grid) > 1:
+            weight = ((frames - grid[left]) / (grid[right] - grid[left]))[:, None]
+            baseline = (grid_baseline[left] * (1 - weight)
+                        + grid_baseline[right] * weight)
+        else:
+            baseline = grid_baseline[np.zeros(n_frames, dtype=int)]
+
+        baseline = pd.DataFrame(baseline, index=data.index, columns=data.columns)
+        self.baseline_error = self._validate_baseline(data, baseline,
+                                                      max_block_bytes)
+
+        return baseline
+
+    def _windowed_percentile(self, values: np.ndarray, grid: np.ndarray,
+                             window_frames: int,
+                             max_block_bytes: int) -> np.ndarray:
+        """Exact backward-looking windowed percentile at selected frames.
+
+        Args:
+            values (np.ndarray): m (images) x n (trace) array.
+            grid (np.ndarray): Sorted frames at which to evaluate.
+            window_frames (int): Window length in frames.
+            max_block_bytes (int): Memory cap (bytes) for the windows
+                evaluated at once.
+
+        Returns:
+            np.ndarray: len(grid) x n (trace) array of percentiles.
+        """
+        q = self.baseline_threshold
+        n_rois = values.shape[1]
+        grid_baseline = np.empty((len(grid), n_rois))
+
+        # leading edge: windows shorter than `window_frames`
+        partial = grid < window_frames - 1
+        for i in np.flatnonzero(partial):
+            grid_baseline[i] = np.percentile(values[:grid[i] + 1], q, axis=0)
+
+        # full windows: evaluated in blocks of grid points
+        full = np.flatnonzero(~partial)
+        if len(full):
+            windows = np.lib.stride_tricks.sliding_window_view(
+                values, window_frames, axis=0
+            )
+            block = max_block_bytes // max(n_rois * window_frames * 8, 1)
+            block = max(int(block), 1)
+            for start in range(0, len(full), block):
+                idx = full[start:start + block]
+                grid_baseline[idx] = np.percentile(
+                    windows[grid[idx] - window_frames + 1], q, axis=-1
+                )
+
+        return grid_baseline
+
+    def _validate_baseline(self, data: pd.DataFrame, baseline: pd.DataFrame,
+                           max_block_bytes: int=2**27) -> pd.DataFrame:
+        """Compare an approximate baseline with the exact baseline.
+
+        The exact reference is evaluated at every frame of the sampled ROIs
+        with the same strided-window path as the decimated baseline, which
+        keeps validation cheap relative to the approximation itself.
+
+        Args:
+            data (pd.DataFrame): m (images) x n (trace) dataframe.
+            baseline (pd.DataFrame): Approximate baseline for `data`.
+            max_block_bytes (int, optional): Memory cap (bytes) for the
+                windows evaluated at once. Defaults to 2**27 (128 MB).
+
+        Returns:
+            pd.DataFrame: Maximum absolute and relative (percent) deviation
+                for each validated ROI.
+        """
+        n_rois = data.shape[1]
+        n_sample = min(self.baseline_validation_rois or 0, n_rois)
+        if n_sample == 0:
+            return None
+
+        # evenly spaced, deterministic sample of ROIs
+        sample = np.unique(np.linspace(0, n_rois - 1, n_sample).astype(int))
+        subset = data.iloc[:, sample]
+
+        decimation = self.baseline_decimation
+        window_frames = max(int(self.window_size * self.frames_per_second), 1)
+        exact = self._windowed_percentile(
+            subset.to_numpy(dtype=np.float64), np.arange(len(subset)),
+            window_frames, max_block_bytes
+        )
+
+        deviation = np.abs(baseline.iloc[:, sample].to_numpy() - exact)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative = deviation / np.abs(exact) * 100
+
+        error = pd.DataFrame({
+            'roi': subset.columns,
+            'max_abs_error': np.nanmax(deviation, axis=0),
+            'max_rel_error': np.nanmax(np.where(np.isinf(relative), np.nan, relative), axis=0)
+        })
+
+        print((f"Decimated baseline (every {decimation} frames): maximum "
+               f"deviation {error['max_abs_error'].max():.4g} "
+               f"({error['max_rel_error'].max():.3g}%) over {len(error)} ROI(s)."))
+
+        return error
+
     def compute_fluoresence_change(self, data: pd.DataFrame,
                                    baseline: pd.DataFrame) -> pd.DataFrame:
         """Compute percent change in flouresence from baseline.
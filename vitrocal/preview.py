@@ -0,0 +1,285 @@
+"""Progressive preview of a preprocess-extract-analyze run."""
+import copy
+import threading
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .base import BaseAnalyzer, BaseExtractor, BasePreprocessor
+
+
+class ProgressivePreview:
+    """Initialize progressive preview object.
+
+    Runs the pipeline on a growing, deterministic subsample of ROIs so that
+    approximate results are available quickly while tuning parameters.
+    `preview()` returns the largest step that fits in `latency_budget`, and
+    `refine()` continues towards the full result on a background thread.
+    Each step extends the ROIs of the previous one, so results converge.
+
+    Every `preview()` works on copies of the pipeline objects taken when it
+    is called, so parameters can be edited while a refinement runs; edits
+    take effect at the next `preview()`. Steps are processed in blocks of
+    ROIs sized to take about `block_seconds` each, and cancellation is
+    checked between blocks, so a cancelled refinement stops within about
+    `block_seconds`.
+
+    Attributes:
+        preprocessor (BasePreprocessor): e.g. `StandardPreprocessor`.
+        extractor (BaseExtractor): e.g. `StandardExtractor`.
+        analyzer (BaseAnalyzer): e.g. `StandardAnalyzer`.
+        steps (Tuple[float], optional): Proportion of ROIs analyzed at each
+            step. Defaults to (0.02, 0.1, 0.3, 1.0).
+        preview_frames (Tuple[int, int], optional): Frame range (start, stop)
+            analyzed in every step but the last. Defaults to None (all frames).
+        latency_budget (float, optional): Seconds `preview()` may take.
+            Defaults to 2.
+        seed (int, optional): Seed of the ROI ordering. Defaults to 0.
+        block_seconds (float, optional): Target runtime of a block of ROIs,
+            i.e. the latency of cancellation. Defaults to 0.25.
+    """
+
+    def __init__(self,
+                 preprocessor: BasePreprocessor,
+                 extractor: BaseExtractor,
+                 analyzer: BaseAnalyzer,
+                 steps: Tuple[float]=(0.02, 0.1, 0.3, 1.0),
+                 preview_frames: Tuple[int, int]=None,
+                 latency_budget: float=2,
+                 seed: int=0,
+                 block_seconds: float=0.25):
+        self.preprocessor = preprocessor
+        self.extractor = extractor
+        self.analyzer = analyzer
+        self.steps = steps
+        self.preview_frames = preview_frames
+        self.latency_budget = latency_budget
+        self.seed = seed
+        self.block_seconds = block_seconds
+
+        self.results = []
+        self._data = None
+        self._order = None
+        self._pipeline = None
+        self._rate = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def preview(self, data: pd.DataFrame) -> dict:
+        """Run steps until the next one would exceed `latency_budget`.
+
+        Any refinement of a previous call is cancelled first; it stops
+        within one block of ROIs (about `block_seconds`). The first step always runs, even if it
+        alone exceeds the budget.
+
+        Args:
+            data (pd.DataFrame): m (images) x n (trace) dataframe.
+
+        Returns:
+            dict: Result of the last completed step (see `run_step()`).
+        """
+        self.cancel(wait=True)
+        self._cancelled = threading.Event()
+        self._data = data
+        self._order = np.random.default_rng(self.seed).permutation(data.shape[1])
+        self._pipeline = copy.deepcopy((self.preprocessor, self.extractor, self.analyzer))
+        self._rate = None
+        self.results = []
+
+        start = time.perf_counter()
+        for step in range(len(self.steps)):
+            elapsed = time.perf_counter() - start
+            if step > 0 and elapsed + self._estimate(step) > self.latency_budget:
+                break
+            self.run_step(step)
+
+        return self.results[-1]
+
+    def refine(self, callback: Callable[[dict], None]=None) -> threading.Thread:
+        """Run the remaining steps on a background thread.
+
+        Results of a cancelled refinement are never added to `results` or
+        passed to `callback`.
+
+        Args:
+            callback (Callable[[dict], None], optional): Called with the result
+                of every completed step. Defaults to None.
+
+        Raises:
+            RuntimeError: `preview()` must be called first.
+
+        Returns:
+            threading.Thread: Worker thread, e.g. to `join()`.
+        """
+        if self._data is None:
+            raise RuntimeError("Call preview() before refine().")
+
+        self.cancel(wait=True)
+        self._cancelled = cancelled = threading.Event()
+        data, order, pipeline, results = self._data, self._order, self._pipeline, self.results
+
+        def _refine():
+            """Run outstanding steps until done or cancelled."""
+            for step in range(len(results), len(self.steps)):
+                result = self._run_step(step, data, order, pipeline, cancelled)
+                with self._lock:
+                    if result is None or cancelled.is_set():
+                        return
+                    self._rate = result['seconds'] / max(result['rois'] * result['frames'], 1)
+                    results.append(result)
+                if callback is not None:
+                    callback(result)
+
+        self._thread = threading.Thread(target=_refine, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def cancel(self, wait: bool=False) -> None:
+        """Stop refinement.
+
+        The worker stops at the next block of ROIs and discards the step it
+        was running.
+
+        Args:
+            wait (bool, optional): Wait until the worker has stopped.
+                Defaults to False.
+        """
+        with self._lock:
+            self._cancelled.set()
+        thread, self._thread = self._thread, None
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def run_step(self, step: int) -> dict:
+        """Analyze the ROIs and frames of a single step.
+
+        Args:
+            step (int): Index into `steps`.
+
+        Returns:
+            dict: Step index, number of ROIs and frames, runtime, summary
+                statistics (with event counts extrapolated to all ROIs and
+                frames) and the analyzer output.
+        """
+        result = self._run_step(step, self._data, self._order, self._pipeline)
+        self._rate = result['seconds'] / max(result['rois'] * result['frames'], 1)
+        self.results.append(result)
+        return result
+
+    def _run_step(self, step: int, data: pd.DataFrame, order: np.ndarray,
+                  pipeline: tuple, cancelled: threading.Event=None) -> dict:
+        """Analyze a single step of the given recording.
+
+        Args:
+            step (int): Index into `steps`.
+            data (pd.DataFrame): m (images) x n (trace) dataframe.
+            order (np.ndarray): ROI order from which steps draw their ROIs.
+            pipeline (tuple): Preprocessor, extractor and analyzer.
+            cancelled (threading.Event, optional): Checked between blocks of
+                ROIs. Defaults to None.
+
+        Returns:
+            dict: See `run_step()`; None if cancelled.
+        """
+        preprocessor, extractor, analyzer = pipeline
+        n_rois, n_frames = self._step_size(step, data)
+        start_frame = self._frame_range(step, data)[0]
+        rois = np.sort(order[:n_rois])
+
+        start = time.perf_counter()
+        events = {}
+        done, block = 0, 1
+        while done < n_rois:
+            if cancelled is not None and cancelled.is_set():
+                return None
+            block_start = time.perf_counter()
+            subset = data.iloc[start_frame:start_frame + n_frames,
+                               rois[done:done + block]]
+            processed = preprocessor.preprocess(subset)
+            events.update(extractor.detect_and_extract(processed))
+            done += subset.shape[1]
+
+            # grow blocks (at most 4x) towards `block_seconds` per block
+            per_roi = (time.perf_counter() - block_start) / subset.shape[1]
+            target = int(self.block_seconds / per_roi) if per_roi > 0 else 4 * block
+            block = min(max(target, 1), 4 * block)
+        if cancelled is not None and cancelled.is_set():
+            return None
+        output = analyzer.analyze(events)
+        elapsed = time.perf_counter() - start
+
+        results = output[0] if isinstance(output, tuple) else output
+        n_events = sum(len(v) for v in events.values())
+        scale = (data.shape[1] / max(n_rois, 1)) * (len(data) / max(n_frames, 1))
+
+        summary = {
+            'events': n_events,
+            'events_per_roi': n_events / max(n_rois, 1),
+            'estimated_total_events': n_events * scale,
+        }
+        for column in ('peak', 'decay'):
+            if isinstance(results, pd.DataFrame) and column in results:
+                summary[f'mean_{column}'] = results[column].astype(float).mean()
+
+        print((f"Step {step + 1}/{len(self.steps)}: {n_rois} ROI(s) x "
+               f"{n_frames} frame(s) in {elapsed:.2f} s."))
+
+        return {
+            'step': step,
+            'rois': n_rois,
+            'frames': n_frames,
+            'final': step == len(self.steps) - 1,
+            'seconds': elapsed,
+            'summary': summary,
+            'output': output,
+        }
+
+    def _frame_range(self, step: int, data: pd.DataFrame=None) -> Tuple[int, int]:
+        """Frame range (start, stop) of a step.
+
+        Args:
+            step (int): Index into `steps`.
+            data (pd.DataFrame, optional): Recording. Defaults to the current one.
+
+        Returns:
+            Tuple[int, int]: Start and stop frame.
+        """
+        data = self._data if data is None else data
+        n_frames = len(data)
+        if self.preview_frames is None or step == len(self.steps) - 1:
+            return 0, n_frames
+        start, stop = self.preview_frames
+        return max(start, 0), min(stop, n_frames)
+
+    def _step_size(self, step: int, data: pd.DataFrame=None) -> Tuple[int, int]:
+        """Number of ROIs and frames of a step.
+
+        Args:
+            step (int): Index into `steps`.
+            data (pd.DataFrame, optional): Recording. Defaults to the current one.
+
+        Returns:
+            Tuple[int, int]: Number of ROIs and frames.
+        """
+        data = self._data if data is None else data
+        total = data.shape[1]
+        n_rois = total if step == len(self.steps) - 1 else int(np.ceil(self.steps[step] * total))
+        start, stop = self._frame_range(step, data)
+        return min(max(n_rois, 1), total), stop - start
+
+    def _estimate(self, step: int) -> float:
+        """Estimated runtime (seconds) of a step from the previous step.
+
+        Args:
+            step (int): Index into `steps`.
+
+        Returns:
+            float: Estimated seconds.
+        """
+        if self._rate is None:
+            return 0.0
+        n_rois, n_frames = self._step_size(step)
+        return self._rate * n_rois * n_frames
@@ -0,0 +1,211 @@
+"""Mergeable summaries for aggregating events across recordings."""
+import numpy as np
+import pandas as pd
+
+
+class AverageEventSketch:
+    """Initialize mergeable average-event sketch object.
+
+    Keeps, for every event index, the count and sum of values plus a
+    logarithmically binned quantile sketch (DDSketch; Masson, Rim & Lee,
+    2019, PVLDB). Sketches of different files or worker processes are
+    combined exactly with `merge()`, so condition-level average events are
+    computed in memory proportional to the event length, not the number
+    of events.
+
+    Approximation error: a quantile returned by `summary()` lies within a
+    relative error of `relative_accuracy` of the exact lower-rank quantile
+    (`np.quantile(..., method='lower')`) for values whose magnitude is between
+    `min_value` and `max_value`. Smaller magnitudes are reported as 0 and
+    larger ones as +/- `max_value`. Counts and means are exact.
+
+    Attributes:
+        relative_accuracy (float, optional): Relative error of quantiles.
+            Defaults to 0.01.
+        min_value (float, optional): Smallest distinguishable magnitude.
+            Defaults to 1e-3.
+        max_value (float, optional): Largest distinguishable magnitude.
+            Defaults to 1e6.
+    """
+
+    def __init__(self,
+                 relative_accuracy: float=0.01,
+                 min_value: float=1e-3,
+                 max_value: float=1e6):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._offset = int(np.floor(self._log_gamma(min_value)))
+        self._n_bins = int(np.ceil(self._log_gamma(max_value))) - self._offset + 1
+
+        self.count = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0)
+        self.zero = np.zeros(0, dtype=np.int64)
+        self.positive = np.zeros((0, self._n_bins), dtype=np.int64)
+        self.negative = np.zeros((0, self._n_bins), dtype=np.int64)
+
+    def update(self, matrix: np.ndarray) -> "AverageEventSketch":
+        """Add events to the sketch.
+
+        Args:
+            matrix (np.ndarray): n (events) x event length matrix, NaN-padded,
+                e.g. from `StandardAnalyzer.event_matrix()`.
+
+        Returns:
+            AverageEventSketch: The updated sketch.
+        """
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+        self._resize(matrix.shape[1])
+
+        observed = ~np.isnan(matrix)
+        self.count[:matrix.shape[1]] += observed.sum(axis=0)
+        self.total[:matrix.shape[1]] += np.where(observed, matrix, 0).sum(axis=0)
+
+        index = np.broadcast_to(np.arange(matrix.shape[1]), matrix.shape)[observed]
+        values = matrix[observed]
+        magnitude = np.abs(values)
+
+        is_zero = magnitude < self.min_value
+        np.add.at(self.zero, index[is_zero], 1)
+
+        keys = self._key(magnitude[~is_zero])
+        for store, sign in ((self.positive, values > 0), (self.negative, values < 0)):
+            selected = sign[~is_zero]
+            np.add.at(store, (index[~is_zero][selected], keys[selected]), 1)
+
+        return self
+
+    def merge(self, other: "AverageEventSketch") -> "AverageEventSketch":
+        """Add the contents of another sketch to this one.
+
+        Args:
+            other (AverageEventSketch): Sketch with the same settings.
+
+        Raises:
+            ValueError: Sketches must share accuracy and value range.
+
+        Returns:
+            AverageEventSketch: The merged sketch.
+        """
+        settings = ('relative_accuracy', 'min_value', 'max_value')
+        if any(getattr(self, s) != getattr(other, s) for s in settings):
+            raise ValueError("Only sketches with the same settings can be merged.")
+
+        length = len(other.count)
+        self._resize(length)
+        self.count[:length] += other.count
+        self.total[:length] += other.total
+        self.zero[:length] += other.zero
+        self.positive[:length] += other.positive
+        self.negative[:length] += other.negative
+
+        return self
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Approximate quantile for every event index.
+
+        Args:
+            q (float): Quantile between 0 and 1.
+
+        Returns:
+            np.ndarray: Quantile per index (NaN where no values were added).
+        """
+        bins = np.arange(self._n_bins) + self._offset
+        representative = np.minimum(
+            2 * self._gamma ** bins / (self._gamma + 1), self.max_value
+        )
+        values = np.concatenate([-representative[::-1], [0], representative])
+        counts = np.hstack([self.negative[:, ::-1], self.zero[:, None], self.positive])
+
+        rank = np.floor(q * (self.count - 1))
+        position = np.argmax(np.cumsum(counts, axis=1) > rank[:, None], axis=1)
+
+        return np.where(self.count > 0, values[position], np.nan)
+
+    def summary(self) -> pd.DataFrame:
+        """Average event with quantile band.
+
+        Returns:
+            pd.DataFrame: q1, q3, median, mean and count per index, with the
+                columns of `StandardAnalyzer.find_average_event()`.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = self.total / self.count
+
+        return pd.DataFrame({
+            'q1': self.quantile(.25),
+            'q3': self.quantile(.75),
+            'median': self.quantile(.5),
+            'mean': mean,
+            'count': self.count
+        }, index=pd.RangeIndex(len(self.count), name='index'))
+
+    def save(self, fpath: str) -> None:
+        """Save the sketch, e.g. as a per-file partial summary.
+
+        Args:
+            fpath (str): Path of the `.npz` file.
+        """
+        np.savez_compressed(
+            fpath,
+            settings=np.array([self.relative_accuracy, self.min_value, self.max_value]),
+            count=self.count, total=self.total, zero=self.zero,
+            positive=self.positive, negative=self.negative
+        )
+
+    @classmethod
+    def load(cls, fpath: str) -> "AverageEventSketch":
+        """Load a sketch saved with `save()`.
+
+        Args:
+            fpath (str): Path of the `.npz` file.
+
+        Returns:
+            AverageEventSketch: Sketch.
+        """
+        with np.load(fpath) as data:
+            sketch = cls(*data['settings'].tolist())
+            for name in ('count', 'total', 'zero', 'positive', 'negative'):
+                setattr(sketch, name, data[name])
+        return sketch
+
+    def _log_gamma(self, x: np.ndarray) -> np.ndarray:
+        """Logarithm with base `gamma`.
+
+        Args:
+            x (np.ndarray): Positive values.
+
+        Returns:
+            np.ndarray: log(x) / log(gamma).
+        """
+        return np.log(x) / np.log(self._gamma)
+
+    def _key(self, magnitude: np.ndarray) -> np.ndarray:
+        """Bin of each magnitude.
+
+        Args:
+            magnitude (np.ndarray): Values of at least `min_value`.
+
+        Returns:
+            np.ndarray: Bin index.
+        """
+        keys = np.ceil(self._log_gamma(magnitude)).astype(np.int64) - self._offset
+        return np.clip(keys, 0, self._n_bins - 1)
+
+    def _resize(self, length: int) -> None:
+        """Extend the per-index state to at least `length` indices.
+
+        Args:
+            length (int): Event length.
+        """
+        extra = length - len(self.count)
+        if extra <= 0:
+            return
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.total = np.concatenate([self.total, np.zeros(extra)])
+        self.zero = np.concatenate([self.zero, np.zeros(extra, dtype=np.int64)])
+        padding = np.zeros((extra, self._n_bins), dtype=np.int64)
+        self.positive = np.vstack([self.positive, padding])
+        self.negative = np.vstack([self.negative, padding])